@@ -0,0 +1,106 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+
+from metrics import Counter, Gauge, Histogram
+
+load_dotenv()
+
+# Turns one worker runs at once; the rest wait briefly or get a busy reply.
+ADMISSION_MAX_TURNS = int(os.environ.get("ADMISSION_MAX_TURNS", "32"))
+ADMISSION_QUEUE_SIZE = int(os.environ.get("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+# How many turns from one conversation may wait at once, so a chatty conversation cannot fill the queue.
+ADMISSION_PER_CONVERSATION_QUEUE = int(os.environ.get("ADMISSION_PER_CONVERSATION_QUEUE", "2"))
+
+ADMISSION_DECISIONS = Counter("bot_admission_total", "Admission decisions: admitted, queued, rejected_full, rejected_timeout.", ("outcome",))
+ADMISSION_WAIT = Histogram("bot_admission_wait_seconds", "Time admitted turns spent waiting in the admission queue.")
+ADMISSION_ACTIVE = Gauge("bot_admission_active_turns", "Turns currently holding an admission slot.")
+ADMISSION_QUEUED = Gauge("bot_admission_queued_turns", "Turns currently waiting for an admission slot.")
+DROPPED_ACTIVITIES = Counter("bot_dropped_activities_total", "Non-message activities rejected at capacity (they get no busy reply), by type.", ("type",))
+
+class AdmissionController:
+    """
+    Cap on concurrent turns with a short, bounded wait queue. Waiting turns are grouped by
+    conversation and slots are handed out round-robin across conversations, so one busy
+    conversation cannot starve the others. A turn that finds the queue full, or waits
+    longer than queue_timeout, is rejected and should get a quick "busy" reply.
+    """
+    def __init__(self, max_turns=ADMISSION_MAX_TURNS, queue_size=ADMISSION_QUEUE_SIZE,
+                 queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS, per_conversation_queue=ADMISSION_PER_CONVERSATION_QUEUE):
+        self.max_turns = max_turns
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.per_conversation_queue = per_conversation_queue
+        self.active = 0
+        self.queued = 0
+        self._waiters = OrderedDict()
+
+    async def acquire(self, conversation_id):
+        """
+        Return True once the turn holds a slot (call release() when it is done), or False if it was rejected.
+        """
+        if self.active < self.max_turns and not self.queued:
+            self._grant()
+            ADMISSION_DECISIONS.inc(outcome="admitted")
+            return True
+        waiters = self._waiters.get(conversation_id)
+        if self.queued >= self.queue_size or (waiters is not None and len(waiters) >= self.per_conversation_queue):
+            ADMISSION_DECISIONS.inc(outcome="rejected_full")
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(conversation_id, deque()).append(future)
+        self._set_queued(self.queued + 1)
+        ADMISSION_DECISIONS.inc(outcome="queued")
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait ended; give it back.
+                self.release()
+            else:
+                future.cancel()
+                self._discard(conversation_id, future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            ADMISSION_DECISIONS.inc(outcome="rejected_timeout")
+            return False
+        ADMISSION_WAIT.observe(time.perf_counter() - start)
+        return True
+
+    def release(self):
+        self.active -= 1
+        ADMISSION_ACTIVE.set(self.active)
+        while self._waiters and self.active < self.max_turns:
+            # Oldest waiting conversation first; it goes to the back if it has more turns waiting.
+            conversation_id, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(conversation_id)
+            else:
+                del self._waiters[conversation_id]
+            self._set_queued(self.queued - 1)
+            if not future.done():
+                self._grant()
+                future.set_result(True)
+
+    def _grant(self):
+        self.active += 1
+        ADMISSION_ACTIVE.set(self.active)
+
+    def _discard(self, conversation_id, future):
+        waiters = self._waiters.get(conversation_id)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self._set_queued(self.queued - 1)
+            if not waiters:
+                del self._waiters[conversation_id]
+
+    def _set_queued(self, queued):
+        self.queued = queued
+        ADMISSION_QUEUED.set(queued)
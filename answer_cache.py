@@ -0,0 +1,163 @@
+import os
+import re
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity over word and word-pair counts; high enough that "restart" and "stop" questions stay apart.
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", "0.85"))
+ANSWER_CACHE_POLL_SECONDS = float(os.environ.get("ANSWER_CACHE_POLL_SECONDS", "60"))
+
+WORD = re.compile(r"[a-z0-9]+")
+# Filler that changes the wording of a question but not what is being asked.
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "be", "do", "does", "did", "i", "we", "you", "my", "our",
+    "how", "what", "can", "could", "should", "would", "please", "to", "of", "in", "on", "for", "it", "me"
+}
+
+def normalize_question(text):
+    return " ".join(WORD.findall(text.lower()))
+
+def question_features(normalized):
+    words = [w for w in normalized.split() if w not in STOP_WORDS]
+    features = {}
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        features[feature] = features.get(feature, 0) + 1
+    return features
+
+def cosine(a, b):
+    dot = sum(count * b.get(feature, 0) for feature, count in a.items())
+    if not dot:
+        return 0.0
+    return dot / (math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values())))
+
+class AnswerCache:
+    """
+    In-process cache of bot answers. The exact tier matches the normalized question text;
+    the similar tier compares word and word-pair counts against the cached questions that
+    share at least one word with it. Entries expire after ttl seconds, the least recently
+    used ones are evicted past max_entries, and everything is dropped when an index the
+    answers came from changes (see watch_indexes).
+    """
+    def __init__(self, max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl=ANSWER_CACHE_TTL_SECONDS,
+                 similarity=ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.entries = OrderedDict()
+        self._by_word = {}
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.fingerprint = None
+
+    def get(self, question):
+        """
+        Return (answer, "exact" | "similar") for a cached question, or (None, None).
+        """
+        normalized = normalize_question(question)
+        entry = self._live_entry(normalized)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry["answer"], "exact"
+
+        features = question_features(normalized)
+        scored = []
+        for candidate in self._candidates(features):
+            score = cosine(features, self.entries[candidate]["features"])
+            if score >= self.similarity:
+                scored.append((score, candidate))
+        # Most similar first; an expired candidate is dropped and the next one gets its turn.
+        for _, candidate in sorted(scored, reverse=True):
+            entry = self._live_entry(candidate)
+            if entry is not None:
+                self.similar_hits += 1
+                return entry["answer"], "similar"
+        self.misses += 1
+        return None, None
+
+    def put(self, question, answer):
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        self._remove(normalized)
+        features = question_features(normalized)
+        self.entries[normalized] = {"answer": answer, "features": features, "expires": time.monotonic() + self.ttl}
+        for feature in features:
+            if " " not in feature:
+                self._by_word.setdefault(feature, set()).add(normalized)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def clear(self):
+        self.entries.clear()
+        self._by_word.clear()
+
+    def stats(self):
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        hit_rate = (self.exact_hits + self.similar_hits) / lookups * 100 if lookups else 0.0
+        return (f"Answer cache: {len(self.entries)} entries, {self.exact_hits} exact / {self.similar_hits} similar hit(s), "
+                f"{self.misses} miss(es) ({hit_rate:.0f}% hit rate), {self.invalidations} invalidation(s)")
+
+    def _live_entry(self, normalized):
+        entry = self.entries.get(normalized)
+        if entry is None:
+            return None
+        if entry["expires"] < time.monotonic():
+            self._remove(normalized)
+            return None
+        self.entries.move_to_end(normalized)
+        return entry
+
+    def _candidates(self, features):
+        candidates = set()
+        for feature in features:
+            candidates |= self._by_word.get(feature, set())
+        return candidates
+
+    def _remove(self, normalized):
+        entry = self.entries.pop(normalized, None)
+        if entry is None:
+            return
+        for feature in entry["features"]:
+            keys = self._by_word.get(feature)
+            if keys is not None:
+                keys.discard(normalized)
+                if not keys:
+                    del self._by_word[feature]
+
+    def invalidate(self, fingerprint):
+        """
+        Record the current fingerprint of the searched indexes; a change from the last one
+        means an index was rebuilt or updated, so every cached answer is dropped.
+        """
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            logger.info(f"Search indexes changed; dropping {len(self.entries)} cached answer(s)")
+            self.clear()
+            self.invalidations += 1
+        self.fingerprint = fingerprint
+
+    async def watch_indexes(self, search_client, indexes, interval=ANSWER_CACHE_POLL_SECONDS):
+        """
+        Poll the indexes' fingerprints until cancelled (see AsyncSearchClient.index_fingerprint).
+        Call invalidate() with a first fingerprint before starting this, so a key that cannot
+        read the indexes keeps the worker from becoming ready instead of only logging a
+        warning every interval.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.invalidate(await search_client.index_fingerprint(indexes))
+            except Exception as e:
+                logger.warning(f"Could not check search indexes for changes: {e}")
@@ -0,0 +1,69 @@
+'''
+Compare the token-aware chunker against the old fixed-size splitter
+(split_text_with_overlap, 3000 characters with 300 of overlap): chunk count, total
+tokens, how close chunks sit to the budget and how many chunks end mid-word.
+
+    python benchmark-chunking.py [fixtures_dir] [--transcripts DIR] [--target-tokens N]
+'''
+
+import os
+import time
+import argparse
+from create_index import split_text_with_overlap, clean_transcript_text
+from page_extract import parse_page
+from chunker import chunk_page, chunk_text, count_tokens, tokenizer_name, CHUNK_TARGET_TOKENS, CHUNK_OVERLAP_TOKENS
+
+def mid_word_cuts(chunks):
+    return sum(1 for a, b in zip(chunks, chunks[1:]) if a and b and a[-1].isalnum() and b[0].isalnum())
+
+def describe(label, chunks, elapsed):
+    tokens = [count_tokens(c) for c in chunks]
+    total = sum(tokens)
+    avg = total / len(tokens) if tokens else 0
+    largest = max(tokens) if tokens else 0
+    print(f"  {label:24} chunks={len(chunks):<4} tokens={total:<7} avg={avg:6.0f} max={largest:<5} "
+          f"mid-word={mid_word_cuts(chunks):<3} {elapsed * 1000:7.1f} ms")
+    return len(chunks), total
+
+def load_sources(fixtures_dir, transcripts_dir):
+    sources = []
+    for name in sorted(f for f in os.listdir(fixtures_dir) if f.endswith(".html")):
+        with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+            sources.append((name, parse_page(f.read()), None))
+    if transcripts_dir and os.path.isdir(transcripts_dir):
+        for name in sorted(f for f in os.listdir(transcripts_dir) if f.endswith(".txt")):
+            with open(os.path.join(transcripts_dir, name), "r", encoding="utf-8") as f:
+                sources.append((name, None, clean_transcript_text(f.read())))
+    return sources
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare chunk counts and token totals of the two chunkers.")
+    parser.add_argument("fixtures_dir", nargs="?", default=os.path.join("fixtures", "html"))
+    parser.add_argument("--transcripts", default="Meeting Transcripts")
+    parser.add_argument("--target-tokens", type=int, default=CHUNK_TARGET_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS)
+    args = parser.parse_args()
+
+    print(f"Tokenizer: {tokenizer_name()}, target {args.target_tokens} tokens, overlap {args.overlap_tokens} tokens")
+    totals = {"fixed": [0, 0], "token-aware": [0, 0]}
+    for name, page, text in load_sources(args.fixtures_dir, args.transcripts):
+        print(name)
+        start = time.perf_counter()
+        fixed = split_text_with_overlap(page.main_text if page else text, chunk_size=3000, overlap=300)
+        counts = describe("fixed 3000/300 chars", fixed, time.perf_counter() - start)
+        totals["fixed"] = [t + c for t, c in zip(totals["fixed"], counts)]
+
+        start = time.perf_counter()
+        if page:
+            chunks = chunk_page(page, args.target_tokens, args.overlap_tokens)
+        else:
+            chunks = chunk_text(text, args.target_tokens, args.overlap_tokens)
+        counts = describe("token-aware", chunks, time.perf_counter() - start)
+        totals["token-aware"] = [t + c for t, c in zip(totals["token-aware"], counts)]
+
+    (fixed_chunks, fixed_tokens), (new_chunks, new_tokens) = totals["fixed"], totals["token-aware"]
+    print(f"Total: {fixed_chunks} -> {new_chunks} chunk(s), {fixed_tokens} -> {new_tokens} token(s)"
+          f" ({(new_tokens - fixed_tokens) / fixed_tokens * 100 if fixed_tokens else 0:+.1f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+'''
+Compare the old temp-file ingestion path (write the download to tmp/, reopen it with
+fitz.open or open(), delete it) with in-memory extraction from file_extract.py:
+files per second and peak RSS. Each path runs in a fresh process so the peak RSS of
+one does not hide the other's. Then the largest PDF is extracted page by page on
+PdfExtractor's process pool with 1, 2, 4, ... workers to show how it scales.
+
+    python benchmark-file-ingestion.py DIR [--repeat N] [--workers 1,2,4,8]
+    python benchmark-file-ingestion.py --synthesize 20 [--pages 200]
+
+DIR is read through LocalDirSource, the same interface create-file-indices uses for blobs.
+'''
+
+import os
+import sys
+import asyncio
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+import multiprocessing
+import fitz  # PyMuPDF
+from file_source import LocalDirSource
+from file_extract import extract_file_text, PdfExtractor, pdf_pages
+
+SUFFIXES = (".pdf", ".md")
+
+def temp_file_text(source, file, tmp_dir):
+    path = os.path.join(tmp_dir, os.path.basename(file.name))
+    with open(path, "wb") as f:
+        f.write(source.read(file.name))
+    if file.name.endswith(".pdf"):
+        document = fitz.open(path)
+        text = " ".join([page.get_text() for page in document])
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    os.remove(path)
+    return text
+
+def run(mode, root, repeat, results):
+    source = LocalDirSource(root)
+    files = list(source.list_files(SUFFIXES))
+    tmp_dir = tempfile.mkdtemp()
+    chars = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for file in files:
+            text = temp_file_text(source, file, tmp_dir) if mode == "temp-file" else extract_file_text(source, file)
+            chars += len(text)
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    # ru_maxrss is in KB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    results.put((len(files) * repeat, chars, elapsed, peak))
+
+def page_scaling(root, file, worker_counts, repeat):
+    data = LocalDirSource(root).read(file.name)
+    expected = list(pdf_pages(data))
+    print(f"Page-range extraction of {file.name} ({len(expected)} pages, {os.cpu_count()} CPU(s))")
+    baseline = None
+    for workers in worker_counts:
+        # Small ranges so even a modest fixture is split across every worker.
+        with PdfExtractor(workers, min_pages_per_task=1) as extractor:
+            asyncio.run(extractor.pages(data))  # start the worker processes outside the timing
+            start = time.perf_counter()
+            for _ in range(repeat):
+                pages = asyncio.run(extractor.pages(data))
+            elapsed = (time.perf_counter() - start) / repeat
+        in_order = [p.text for p in pages] == expected and [p.number for p in pages] == list(range(1, len(expected) + 1))
+        baseline = baseline or elapsed
+        print(f"  workers={workers:<3} {elapsed * 1000:8.1f} ms  {len(pages) / elapsed:8.0f} pages/s  "
+              f"speedup {baseline / elapsed:4.2f}x  pages in order: {in_order}")
+
+def synthesize(root, count, pages):
+    line = "Restart the deployment slot, check the health probe and swap again if it is still unhealthy. "
+    for i in range(count):
+        document = fitz.open()
+        for p in range(pages):
+            page = document.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Runbook {i} page {p}\n" + line * 20)
+        document.save(os.path.join(root, f"sample-{i:03}.pdf"))
+        document.close()
+        with open(os.path.join(root, f"sample-{i:03}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Runbook {i}\n\n" + (line + "\n") * pages * 5)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare temp-file and in-memory PDF/markdown extraction.")
+    parser.add_argument("dir", nargs="?")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--synthesize", type=int, default=0, help="Generate this many sample PDFs and markdown files instead of reading DIR")
+    parser.add_argument("--pages", type=int, default=100, help="Pages per synthesized PDF")
+    parser.add_argument("--workers", default="1,2,4,8", help="Worker counts for the page-range scaling run")
+    args = parser.parse_args()
+
+    root = args.dir
+    if args.synthesize:
+        root = tempfile.mkdtemp(prefix="ingestion-samples-")
+        synthesize(root, args.synthesize, args.pages)
+    if not root:
+        parser.error("give a directory of sample files or --synthesize N")
+
+    files = list(LocalDirSource(root).list_files(SUFFIXES))
+    total_mb = sum(f.size for f in files) / (1024 * 1024)
+    print(f"{len(files)} file(s), {total_mb:.1f} MB, {args.repeat} repeat(s) from {root}")
+    context = multiprocessing.get_context("spawn")
+    for mode in ("temp-file", "in-memory"):
+        results = context.Queue()
+        process = context.Process(target=run, args=(mode, root, args.repeat, results))
+        process.start()
+        count, chars, elapsed, peak = results.get()
+        process.join()
+        print(f"  {mode:10} {count / elapsed:8.1f} files/s  {elapsed:6.2f} s  peak RSS {peak:7.1f} MB  ({chars} chars)")
+    pdfs = [f for f in files if f.name.endswith(".pdf")]
+    if pdfs:
+        page_scaling(root, max(pdfs, key=lambda f: f.size), [int(w) for w in args.workers.split(",")], args.repeat)
+    if args.synthesize:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
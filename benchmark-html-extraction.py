@@ -0,0 +1,59 @@
+'''
+Micro-benchmark: the single-parse page_extract.parse_page against the old
+three-parse path (extract_title + extract_main_content + extract_sections_from_article).
+
+    python benchmark-html-extraction.py [fixtures_dir] [--iterations N]
+'''
+
+import os
+import time
+import argparse
+from create_index import extract_title, extract_main_content, extract_sections_from_article
+from page_extract import parse_page, HTML_PARSER
+
+def three_parse(html):
+    return extract_title(html), extract_main_content(html), extract_sections_from_article(html)
+
+def single_parse(html, parser):
+    page = parse_page(html, parser=parser)
+    return page.title, page.main_text, page.sections
+
+def time_path(fn, pages, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in pages:
+            fn(html)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML extraction paths over saved pages.")
+    parser.add_argument("fixtures_dir", nargs="?", default=os.path.join("fixtures", "html"))
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(args.fixtures_dir) if f.endswith(".html"))
+    pages = []
+    for name in files:
+        with open(os.path.join(args.fixtures_dir, name), "r", encoding="utf-8") as f:
+            pages.append(f.read())
+    total_kb = sum(len(p) for p in pages) / 1024
+    print(f"{len(pages)} fixture(s), {total_kb:.0f} KB, {args.iterations} iteration(s)")
+
+    for name, html in zip(files, pages):
+        if single_parse(html, "html.parser") != three_parse(html):
+            print(f"Warning: single-parse output differs from the three-parse path for {name}")
+
+    candidates = [("three-parse (html.parser)", three_parse),
+                  ("single-parse (html.parser)", lambda html: single_parse(html, "html.parser"))]
+    if HTML_PARSER != "html.parser":
+        candidates.append((f"single-parse ({HTML_PARSER})", lambda html: single_parse(html, HTML_PARSER)))
+
+    baseline = None
+    for label, fn in candidates:
+        elapsed = time_path(fn, pages, args.iterations)
+        per_page_ms = elapsed * 1000 / (len(pages) * args.iterations)
+        baseline = baseline or elapsed
+        print(f"{label:32} {per_page_ms:8.2f} ms/page  {baseline / elapsed:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+'''
+Compare the old transcript path (read the whole file, clean_transcript_text, chunk_text)
+with the streaming parser (parse_transcript + segment_transcript): throughput, peak
+Python memory and chunk counts. --hours repeats the transcript with shifted timestamps
+to simulate a multi-hour recording. The streaming path reads the file line by line and,
+like create_index.py, holds one batch of TRANSCRIPT_BATCH_SEGMENTS segments at a time.
+
+    python benchmark-transcript-parsing.py [transcript] [--hours 8]
+'''
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from create_index import clean_transcript_text, transcript_batches
+from chunker import chunk_text, tokenizer_name
+from transcript_parser import parse_transcript, format_timestamp, TIMESTAMP_LINE
+
+def old_path(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return len(chunk_text(clean_transcript_text(f.read())))
+
+def streaming_path(path):
+    # The batches the indexer enhances and uploads one after another; each is dropped before the next is read.
+    return sum(len(batch) for batch in transcript_batches(path, os.path.basename(path)))
+
+def write_long_transcript(source, hours, target):
+    # Copies of the source, each shifted to start where the previous one ended.
+    with open(source, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    utterances = list(parse_transcript(lines))
+    length = utterances[-1].start + 10 if utterances else 3600
+    offset = 0
+    while offset < hours * 3600:
+        for line in lines:
+            match = TIMESTAMP_LINE.match(line)
+            if match:
+                hh, mm, ss = match.groups()
+                line = format_timestamp(int(hh or 0) * 3600 + int(mm) * 60 + int(ss) + offset) + "\n"
+            target.write(line)
+        offset += length
+
+def measure(label, fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunk_count = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    print(f"  {label:10} {size_mb / elapsed:7.2f} MB/s  {elapsed * 1000:8.1f} ms  peak {peak / (1024 * 1024):7.1f} MB  "
+          f"chunks={chunk_count}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcript cleaning/chunking paths.")
+    parser.add_argument("transcript", nargs="?", default=os.path.join("Meeting Transcripts", "nick_office_hours.txt"))
+    parser.add_argument("--hours", type=float, default=0, help="Also run on a synthetic recording this many hours long")
+    args = parser.parse_args()
+
+    print(f"Tokenizer: {tokenizer_name()}")
+    paths = [(args.transcript, False)]
+    if args.hours:
+        target = tempfile.NamedTemporaryFile("w", suffix=".txt", encoding="utf-8", delete=False)
+        with target:
+            write_long_transcript(args.transcript, args.hours, target)
+        paths.append((target.name, True))
+    for path, synthetic in paths:
+        print(f"{os.path.basename(path) if not synthetic else f'{args.hours:g} h synthetic'} "
+              f"({os.path.getsize(path) / 1024:.0f} KB)")
+        measure("old", old_path, path)
+        measure("streaming", streaming_path, path)
+        if synthetic:
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
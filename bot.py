@@ -1,27 +1,51 @@
+import time
+import asyncio
 import logging
 from botbuilder.core import ActivityHandler, TurnContext, MessageFactory
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from azure.identity import ManagedIdentityCredential
 from config import DefaultConfig
-from botbuilder.schema import ChannelAccount
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount
+from llm_client import ChatCompletionError
+from metrics import STAGE_LATENCY, ERRORS
 
 CONFIG = DefaultConfig()
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class MyBot(ActivityHandler):
-    # def __init__(self):
-    #     # Initialize Azure Cognitive Search client
-    #     self.search_client = self.create_search_client()
+ANSWER_SYSTEM_PROMPT = (
+    "You are Deployment Assistant, an expert in deployment and engineering support. "
+    "Answer the engineer's question using only the provided context. "
+    "If the context does not contain the answer, say so instead of guessing. "
+    "Keep step-by-step instructions and command syntax exactly as they appear in the context."
+)
+MAX_CONTEXT_CHARS_PER_DOC = 2000
+ANSWER_TRUNCATED_NOTE = "\n\n_(This answer was cut off because it took too long to generate.)_"
 
-    # def create_search_client(self):
-    #     endpoint = f"https://{CONFIG.SEARCH_SERVICE_NAME}.search.windows.net"
-    #     credential = ManagedIdentityCredential(client_id=CONFIG.USER_ASSIGNED_CLIENT_ID)
-    #     return SearchClient(endpoint=endpoint, index_name="your-index-name", credential=credential)
+class MyBot(ActivityHandler):
+    def __init__(self, query_engine=None, llm_client=None, answer_cache=None):
+        # The clients are shared by every conversation; query_agent creates them when the app starts.
+        self.query_engine = query_engine
+        self.llm_client = llm_client
+        self.answer_cache = answer_cache
 
     async def on_message_activity(self, turn_context: TurnContext):
-        await turn_context.send_activity(f"Echo: '{ turn_context.activity.text }'")
+        question = (turn_context.activity.text or "").strip()
+        if not question:
+            return
+        await self.reply(turn_context, question)
+
+    async def reply(self, turn_context: TurnContext, question):
+        """
+        Answer a question in the conversation of turn_context. query_agent also calls this from
+        a proactive turn in async job mode, where turn_context.activity is not the user's message.
+        """
+        # Show the typing indicator straight away; search and the first tokens take a moment.
+        await send_activity(turn_context, Activity(type=ActivityTypes.typing))
+        if not CONFIG.STREAM_ANSWERS:
+            answer = await self.answer(question)
+            await send_activity(turn_context, MessageFactory.text(answer))
+            return
+        reply = StreamingReply(turn_context)
+        answer = await self.answer(question, on_text=reply.update)
+        await reply.finish(answer)
 
     async def on_members_added_activity(
         self,
@@ -30,17 +54,141 @@ class MyBot(ActivityHandler):
     ):
         for member_added in members_added:
             if member_added.id != turn_context.activity.recipient.id:
-                await turn_context.send_activity("Hello and welcome!")
-
-    # def search_documents(self, query):
-    #     try:
-    #         results = self.search_client.search(search_text=query, top=5)
-    #         response = ""
-    #         for result in results:
-    #             title = result.get("title", "No Title")
-    #             content = result.get("content", "No Content")
-    #             response += f"Title: {title}\nContent: {content}\n\n"
-    #         return response.strip()
-    #     except Exception as e:
-    #         logger.error(f"Search query failed: {e}")
-    #         return "An error occurred while searching."
+                await send_activity(turn_context, "Hello and welcome!")
+
+    async def answer(self, question, on_text=None):
+        """
+        Return the answer to a question. With on_text, the answer is streamed and on_text is
+        awaited with the text generated so far each time a new piece arrives.
+        """
+        if self.query_engine is None or self.llm_client is None:
+            return "Search is not configured for this bot yet."
+        if self.answer_cache is not None:
+            cached, tier = self.answer_cache.get(question)
+            if cached is not None:
+                logger.debug(f"Answer cache hit ({tier})")
+                return cached
+        with STAGE_LATENCY.time(stage="search"):
+            result = await self.query_engine.query(question)
+        if result.timed_out:
+            ERRORS.inc(len(result.timed_out), kind="search_timeout")
+        if result.failed:
+            ERRORS.inc(len(result.failed), kind="search_failed")
+        logger.debug(f"Search: {result}")
+        documents = result.documents
+        if not documents:
+            return "I couldn't find anything in the indexed documentation about that."
+        context = format_documents(documents)
+        prompt = f"Context:\n{context}\n\nQuestion: {question}"
+        truncated = False
+        try:
+            if on_text is None:
+                with STAGE_LATENCY.time(stage="llm"):
+                    answer = await asyncio.wait_for(
+                        self.llm_client.complete(ANSWER_SYSTEM_PROMPT, prompt, max_tokens=CONFIG.ANSWER_MAX_TOKENS, identifier="answer"),
+                        CONFIG.ANSWER_TIMEOUT_SECONDS)
+            else:
+                answer, truncated = await self._stream_answer(prompt, on_text, CONFIG.ANSWER_TIMEOUT_SECONDS)
+        except (ChatCompletionError, asyncio.TimeoutError) as e:
+            ERRORS.inc(kind="llm")
+            logger.error(f"Answer generation failed: {e!r}")
+            # Better to hand back what search found than nothing at all.
+            return "I couldn't generate an answer right now. Here is what I found:\n\n" + context
+        # Only complete answers are cached; a fallback, a cut-off stream or a partial fan-out should be retried next time.
+        if self.answer_cache is not None and answer and not truncated and not result.timed_out and not result.failed:
+            self.answer_cache.put(question, answer)
+        return answer
+
+    async def _stream_answer(self, prompt, on_text, timeout):
+        """
+        Stream the answer into on_text and return (text, truncated). Once some text has been
+        shown, running out of time or a broken stream keeps that text and marks it as cut off
+        instead of replacing it with the search results.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        deltas = self.llm_client.stream(ANSWER_SYSTEM_PROMPT, prompt, max_tokens=CONFIG.ANSWER_MAX_TOKENS, identifier="answer")
+        text = ""
+        # The llm stage is the time spent waiting on the model; sending and editing the reply are timed on their own.
+        generating = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    delta = await asyncio.wait_for(deltas.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    return text.strip(), False
+                except (ChatCompletionError, asyncio.TimeoutError) as e:
+                    if not text.strip():
+                        raise
+                    ERRORS.inc(kind="llm")
+                    logger.warning(f"Answer stream cut off after {len(text)} characters: {e!r}")
+                    return text.strip() + ANSWER_TRUNCATED_NOTE, True
+                finally:
+                    generating += time.perf_counter() - started
+                text += delta
+                await on_text(text)
+        finally:
+            STAGE_LATENCY.observe(generating, stage="llm")
+            await deltas.aclose()
+
+async def send_activity(turn_context, activity):
+    # TurnContext's on_send_activities hooks run before the actual send, so the send is timed here instead.
+    with STAGE_LATENCY.time(stage="send_activity"):
+        return await turn_context.send_activity(activity)
+
+class StreamingReply:
+    """
+    One answer message that grows as the answer streams in. The first text is sent as a new
+    message and later text edits it in place, at most once per STREAM_UPDATE_SECONDS so a
+    fast stream does not turn into a flood of update calls against the channel.
+    """
+    def __init__(self, turn_context, interval=CONFIG.STREAM_UPDATE_SECONDS):
+        self.turn_context = turn_context
+        self.interval = interval
+        self.activity_id = None
+        self.sent_text = None
+        self.last_update = 0.0
+        self.can_update = True
+
+    async def update(self, text):
+        if self.sent_text is None:
+            await self._send(text)
+        elif self.can_update and time.monotonic() - self.last_update >= self.interval:
+            await self._edit(text)
+
+    async def finish(self, text):
+        if self.sent_text is None:
+            await self._send(text)
+        elif text != self.sent_text:
+            await (self._edit(text) if self.can_update else self._send(text))
+
+    async def _send(self, text):
+        response = await send_activity(self.turn_context, MessageFactory.text(text))
+        self.activity_id = response.id if response else None
+        # Without an activity id there is nothing to edit; the final answer then goes out as its own message.
+        self.can_update = self.can_update and self.activity_id is not None
+        self.sent_text = text
+        self.last_update = time.monotonic()
+
+    async def _edit(self, text):
+        activity = MessageFactory.text(text)
+        activity.id = self.activity_id
+        try:
+            with STAGE_LATENCY.time(stage="update_activity"):
+                await self.turn_context.update_activity(activity)
+        except Exception as e:
+            # Not every channel supports editing messages; the full answer is sent on its own at the end instead.
+            logger.warning(f"Could not update the streamed reply ({e}); sending the final answer separately")
+            self.can_update = False
+            return
+        self.sent_text = text
+        self.last_update = time.monotonic()
+
+def format_documents(documents):
+    parts = []
+    for doc in documents:
+        title = doc.get("title") or doc.get("page_title") or "No Title"
+        content = (doc.get("content") or "No Content")[:MAX_CONTEXT_CHARS_PER_DOC]
+        parts.append(f"Title: {title}\nContent: {content}")
+    return "\n\n".join(parts)
@@ -0,0 +1,142 @@
+import os
+import re
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+from llm_client import estimate_tokens
+
+load_dotenv()
+
+# Chunk sizes are measured in model tokens: ~750 tokens is about the 3000 characters the old splitter used.
+CHUNK_TARGET_TOKENS = int(os.environ.get("CHUNK_TARGET_TOKENS", "800"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "60"))
+CHUNK_ENCODING = os.environ.get("CHUNK_ENCODING", "cl100k_base")
+# Use the article sections only when they cover most of the page text; otherwise chunk the full text.
+SECTION_COVERAGE = 0.9
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\n')
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+(?=\S)')
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(CHUNK_ENCODING)
+    except Exception:
+        # tiktoken is missing, or its encoding file cannot be downloaded on this machine.
+        return None
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def tokenizer_name():
+    encoding = _encoding()
+    return f"tiktoken/{encoding.name}" if encoding is not None else "approximate (4 chars/token)"
+
+def _split_words(text, target_tokens):
+    pieces, current, current_tokens = [], [], 0
+    for word in text.split():
+        # Summing per-word counts keeps this linear; it slightly overestimates, which is the safe side.
+        tokens = count_tokens(" " + word)
+        if current and current_tokens + tokens > target_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def _units(text, target_tokens):
+    """
+    Break text into (text, tokens) units no larger than the target, preferring paragraph
+    breaks, then sentence breaks, and only falling back to word breaks for run-on text.
+    """
+    units = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= target_tokens:
+            units.append((paragraph, tokens))
+            continue
+        for sentence in SENTENCE_BREAK.split(paragraph):
+            tokens = count_tokens(sentence)
+            if tokens <= target_tokens:
+                units.append((sentence, tokens))
+            else:
+                units.extend((piece, count_tokens(piece)) for piece in _split_words(sentence, target_tokens))
+    return units
+
+def _pack(units, target_tokens, overlap_tokens, separator, prefix=""):
+    chunks, current, current_tokens = [], [], 0
+    prefix_tokens = count_tokens(prefix) if prefix else 0
+    for text, tokens in units:
+        if current and prefix_tokens + current_tokens + tokens > target_tokens:
+            chunks.append(prefix + separator.join(t for t, _ in current))
+            # Carry whole trailing units forward as overlap so context is never cut mid-sentence.
+            carried, carried_tokens = [], 0
+            for unit in reversed(current):
+                if carried_tokens + unit[1] > overlap_tokens or prefix_tokens + carried_tokens + unit[1] + tokens > target_tokens:
+                    break
+                carried.insert(0, unit)
+                carried_tokens += unit[1]
+            current, current_tokens = carried, carried_tokens
+        current.append((text, tokens))
+        current_tokens += tokens
+    if current:
+        chunks.append(prefix + separator.join(t for t, _ in current))
+    return chunks
+
+def chunk_text(text, target_tokens=CHUNK_TARGET_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Pack text into chunks of close to target_tokens tokens, breaking at paragraph and
+    sentence boundaries and repeating up to overlap_tokens of trailing sentences.
+    """
+    units = _units(text, target_tokens)
+    return _pack(units, target_tokens, overlap_tokens, "\n")
+
+def chunk_sections(sections, target_tokens=CHUNK_TARGET_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Pack article sections ({"title", "content"} dicts) into chunks. Small neighbouring
+    sections share a chunk; a section larger than the budget is split on its own, with
+    its title repeated at the top of every piece.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for section in sections:
+        title = section.get("title", "").strip()
+        content = section.get("content", "").strip()
+        if not content:
+            continue
+        text = f"{title}\n{content}" if title else content
+        tokens = count_tokens(text)
+        if tokens > target_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            prefix = f"{title}\n" if title else ""
+            chunks.extend(_pack(_units(content, target_tokens - count_tokens(prefix)), target_tokens, overlap_tokens, "\n", prefix))
+            continue
+        if current and current_tokens + tokens > target_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def chunk_page(page, target_tokens=CHUNK_TARGET_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """
+    Chunk a parsed page along its article sections, falling back to the main text when the
+    sections leave out a noticeable part of it (text before the first heading, for example).
+    """
+    section_chars = sum(len(s.get("content", "")) + len(s.get("title", "")) for s in page.sections)
+    if page.sections and section_chars >= SECTION_COVERAGE * len(page.main_text):
+        return chunk_sections(page.sections, target_tokens, overlap_tokens)
+    return chunk_text(page.main_text, target_tokens, overlap_tokens)
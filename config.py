@@ -1,4 +1,7 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class DefaultConfig:
     MicrosoftAppId = os.environ.get("AZURE_CLIENT_ID", "")  # Your bot's App Registration ID
@@ -6,3 +9,22 @@ class DefaultConfig:
     MicrosoftAppTenantId = os.environ.get("MicrosoftAppTenantId", "")
     MicrosoftAppClientId = os.environ.get("AZURE_CLIENT_ID", "")  # UAMI Client ID
 
+    # Retrieval: which indexes the bot searches (comma-separated, or * for all) and how long it waits for each one.
+    SEARCH_SERVICE_NAME = os.environ.get("SEARCH_SERVICE_NAME", "")
+    # A query key: the bot only reads. The indexing scripts' ADMIN_KEY is deliberately not used here.
+    SEARCH_API_KEY = os.environ.get("SEARCH_API_KEY", "")
+    SEARCH_INDEXES = [name.strip() for name in os.environ.get("SEARCH_INDEXES", os.environ.get("UNIFIED_INDEX_NAME", "antares-genie-unified")).split(",") if name.strip()]
+    # "key" uses SEARCH_API_KEY; "managed_identity" uses a cached token for the user-assigned identity.
+    SEARCH_AUTH_MODE = os.environ.get("SEARCH_AUTH_MODE", "key").lower()
+    SEARCH_TOP = int(os.environ.get("SEARCH_TOP", "5"))
+    SEARCH_TIMEOUT_SECONDS = float(os.environ.get("SEARCH_TIMEOUT_SECONDS", "3"))
+
+    # Answer generation: a chat turn gives up on the LLM well before the channel gives up on the bot.
+    ANSWER_TIMEOUT_SECONDS = float(os.environ.get("ANSWER_TIMEOUT_SECONDS", "30"))
+    OPENAI_AUTH_MODE = os.environ.get("OPENAI_AUTH_MODE", "key").lower()
+    ANSWER_MAX_TOKENS = int(os.environ.get("ANSWER_MAX_TOKENS", "800"))
+    # Stream answers into the chat: the reply is edited in place at most once per STREAM_UPDATE_SECONDS.
+    STREAM_ANSWERS = os.environ.get("STREAM_ANSWERS", "true").lower() != "false"
+    STREAM_UPDATE_SECONDS = float(os.environ.get("STREAM_UPDATE_SECONDS", "1.0"))
+    ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() != "false"
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "100"))
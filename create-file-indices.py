@@ -5,27 +5,27 @@ Sidelining this script for now. It creates indices the old way for now. create-w
 import os
 import re
 import json
-import time
-import fitz  # PyMuPDF
-import requests
-from azure.storage.blob import BlobServiceClient
+import asyncio
+import argparse
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import SearchIndex, SearchField, SearchFieldDataType
 from dotenv import load_dotenv
+from llm_client import AsyncChatClient, ChatCompletionError, LLM_MAX_CONCURRENCY
+from search_upload import BulkUploader, search_endpoint
+from file_source import open_file_source
+from file_extract import PdfExtractor, join_pages, extract_markdown_text
+from index_manifest import IndexManifest, content_hash
+from pipeline import Pipeline
 
 load_dotenv()
 
-BLOB_CONNECTION_STRING = os.environ.get("BLOB_CONNECTION_STRING")
-CONTAINER_NAME = os.environ.get("CONTAINER_NAME")
 SEARCH_SERVICE_NAME = os.environ.get("SEARCH_SERVICE_NAME")
 ADMIN_KEY = os.environ.get("ADMIN_KEY")
-OPENAI_ENDPOINT = os.environ.get("OPENAI_ENDPOINT")
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-DEPLOYMENT_NAME = os.environ.get("DEPLOYMENT_NAME")
-
-blob_service_client = BlobServiceClient.from_connection_string(BLOB_CONNECTION_STRING)
+# Blobs downloaded at once; each large blob is also fetched in parallel ranges (see file_source.py).
+FILE_DOWNLOAD_WORKERS = int(os.environ.get("FILE_DOWNLOAD_WORKERS", "8"))
+# Kept apart from create_index's manifest: each script rewrites its whole manifest file on every record.
+FILE_INDEX_MANIFEST_PATH = os.environ.get("FILE_INDEX_MANIFEST_PATH", "file-index-manifest.json")
 
 def generate_valid_id(blob_name, chunk_index):
     blob_name = blob_name.replace('.pdf', '').replace('.md', '').lower()
@@ -34,18 +34,9 @@ def generate_valid_id(blob_name, chunk_index):
         index_name = index_name[:128]
     return f"{index_name}-{chunk_index}"
 
-def split_text(text, chunk_size=3000):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
-def extract_text_from_pdf(file_path):
-    document = fitz.open(file_path)
-    return " ".join([page.get_text() for page in document])
+QA_SYSTEM_PROMPT = "You are an AI assistant that generates detailed Q&A pairs for deployment-related documents."
 
-def extract_text_from_md(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        return file.read()
-
-def generate_qa_pairs(file_text, file_name, max_retries=3):
+async def generate_qa_pairs(llm_client, file_text, file_name):
     # Determine target number of Q&A pairs based on document length to prevent it from making stuff up if the document is short.
     target = max(10, min(35, int(len(file_text) / 1000)))
 
@@ -59,82 +50,64 @@ def generate_qa_pairs(file_text, file_name, max_retries=3):
         "but include detailed step-by-step instructions if the documentation contains them. "
         "Accurately cover all technical aspects mentioned in the document, including configuration steps, error resolutions, and command syntax, without omitting any crucial details."
         "Do not invent resolved names for acronyms unless you are absolutely certain of what the acronym means. "
+        "PDF content marks the start of each page with [Page N]; for PDF content, give each pair a 'page' field with the number of the page its answer comes from. "
         "Return the output in JSON format as a list of objects, each with 'question' and 'answer' fields.\n\n"
         "Document Content:\n" + file_text
     )
-    headers = {"Content-Type": "application/json", "api-key": OPENAI_API_KEY}
-    data = {
-        "model": DEPLOYMENT_NAME,
-        "messages": [
-            {"role": "system", "content": "You are an AI assistant that generates detailed Q&A pairs for deployment-related documents."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 4000
-    }
-    
-    attempt = 0
-    while attempt < max_retries:
-        response = requests.post(OPENAI_ENDPOINT, headers=headers, json=data)
-        if response.status_code == 429:
-            wait_time = 21
-            try:
-                error_msg = response.json().get("error", {}).get("message", "")
-                match = re.search(r"after (\d+) seconds", error_msg)
-                if match:
-                    wait_time = int(match.group(1))
-            except Exception:
-                pass
-            print(f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying...")
-            time.sleep(wait_time)
-            attempt += 1
-            continue
-
-        try:
-            response_json = response.json()
-        except Exception as e:
-            print("Error parsing response as JSON:", e)
-            return []
-            
-        message_content = response_json.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-
-        if message_content.startswith("```json"):
-            message_content = message_content[len("```json"):].strip()
-        if message_content.endswith("```"):
-            message_content = message_content[:-3].strip()
-        try:
-            qa_pairs = json.loads(message_content)
-            if isinstance(qa_pairs, str):
-                qa_pairs = json.loads(qa_pairs)
-            if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
-                return qa_pairs
-            else:
-                print("Parsed QA pairs are not in the expected format:", qa_pairs)
-                return []
-        except Exception as e:
-            print("Error parsing QA pairs:", e)
-
-            match = re.search(r'\[.*\]', message_content, re.DOTALL)
-            if match:
-                trimmed = match.group(0)
-                try:
-                    qa_pairs = json.loads(trimmed)
-                    if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
-                        return qa_pairs
-                except Exception as e2:
-                    print("Error parsing trimmed QA pairs:", e2)
+    try:
+        message_content = await llm_client.complete(QA_SYSTEM_PROMPT, prompt, max_tokens=4000, identifier=file_name)
+    except ChatCompletionError as e:
+        print("Max retries reached for", file_name, e)
+        return []
+
+    if message_content.startswith("```json"):
+        message_content = message_content[len("```json"):].strip()
+    if message_content.endswith("```"):
+        message_content = message_content[:-3].strip()
+    try:
+        qa_pairs = json.loads(message_content)
+        if isinstance(qa_pairs, str):
+            qa_pairs = json.loads(qa_pairs)
+        if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
+            return qa_pairs
+        else:
+            print("Parsed QA pairs are not in the expected format:", qa_pairs)
             return []
-    print("Max retries reached for", file_name)
-    return []
+    except Exception as e:
+        print("Error parsing QA pairs:", e)
+
+        match = re.search(r'\[.*\]', message_content, re.DOTALL)
+        if match:
+            trimmed = match.group(0)
+            try:
+                qa_pairs = json.loads(trimmed)
+                if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
+                    return qa_pairs
+            except Exception as e2:
+                print("Error parsing trimmed QA pairs:", e2)
+        return []
+
+def page_number(value, page_count=None):
+    # The page the model attributed a pair to, or None without a page count (markdown) and for values that are not a page of the PDF.
+    if not page_count:
+        return None
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        return None
+    return page if 1 <= page <= page_count else None
 
 def create_or_replace_index(service_name, admin_key, index_name):
-    endpoint = f"https://{service_name}.search.windows.net"
+    endpoint = search_endpoint(service_name)
     credential = AzureKeyCredential(admin_key)
     index_client = SearchIndexClient(endpoint=endpoint, credential=credential)
     fields = [
         SearchField(name="id", type=SearchFieldDataType.String, key=True),
         SearchField(name="content", type=SearchFieldDataType.String, searchable=True),
         SearchField(name="file_name", type=SearchFieldDataType.String, searchable=True),
-        SearchField(name="upload_date", type=SearchFieldDataType.DateTimeOffset, filterable=True)
+        SearchField(name="upload_date", type=SearchFieldDataType.DateTimeOffset, filterable=True),
+        # Model-attributed from the [Page N] markers in the prompt, checked only to be a page of the PDF; not a verified citation.
+        SearchField(name="page", type=SearchFieldDataType.Int32, filterable=True)
     ]
     index = SearchIndex(name=index_name, fields=fields)
     try:
@@ -145,53 +118,105 @@ def create_or_replace_index(service_name, admin_key, index_name):
     index_client.create_index(index)
     print(f"Created index {index_name}")
 
-def upload_documents(service_name, admin_key, index_name, documents):
-    endpoint = f"https://{service_name}.search.windows.net"
-    credential = AzureKeyCredential(admin_key)
-    search_client = SearchClient(endpoint=endpoint, index_name=index_name, credential=credential)
-    results = search_client.upload_documents(documents=documents)
-    print(f"Uploaded {len(documents)} documents to index {index_name}")
-    return results
-
-def main():
-    container_client = blob_service_client.get_container_client(CONTAINER_NAME)
-    print(f"Retrieving files from container {CONTAINER_NAME}")
-    tmp_dir = os.path.join(os.getcwd(), "tmp")
-    os.makedirs(tmp_dir, exist_ok=True)
-    for blob in container_client.list_blobs():
-        if blob.name.endswith(".pdf") or blob.name.endswith(".md"):
-            blob_client = container_client.get_blob_client(blob.name)
-            download_file_path = os.path.join(tmp_dir, blob.name)
-            with open(download_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            if blob.name.endswith(".pdf"):
-                text = extract_text_from_pdf(download_file_path)
-            else:
-                text = extract_text_from_md(download_file_path)
-            qa_pairs = generate_qa_pairs(text, blob.name)
-            if not qa_pairs:
-                print(f"Failed to generate Q&A pairs for {blob.name}. Skipping.")
-                os.remove(download_file_path)
-                continue
-            documents = []
-            for i, qa in enumerate(qa_pairs):
-                if not isinstance(qa, dict):
-                    print(f"Skipping QA pair {i} for {blob.name} because it is not a dict.")
-                    continue
-                question = qa.get("question", "").strip()
-                answer = qa.get("answer", "").strip()
-                content = f"Question: {question}\nAnswer: {answer}"
-                doc = {
-                    "id": generate_valid_id(blob.name, i),
-                    "content": content,
-                    "file_name": blob.name,
-                    "upload_date": blob.creation_time.isoformat() if hasattr(blob, "creation_time") and blob.creation_time else ""
-                }
-                documents.append(doc)
-            index_name_final = generate_valid_id(blob.name, 0)
-            create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name_final)
-            upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name_final, documents)
-            os.remove(download_file_path)
+def upload_documents(uploader, index_name, documents):
+    report = uploader.upload(index_name, documents)
+    print(report)
+    for key, message in report.failed[:10]:
+        print(f"  Failed {key}: {message}")
+    return report
+
+def build_documents(blob, qa_pairs, page_count=None):
+    documents = []
+    for i, qa in enumerate(qa_pairs):
+        if not isinstance(qa, dict):
+            print(f"Skipping QA pair {i} for {blob.name} because it is not a dict.")
+            continue
+        question = qa.get("question", "").strip()
+        answer = qa.get("answer", "").strip()
+        content = f"Question: {question}\nAnswer: {answer}"
+        doc = {
+            "id": generate_valid_id(blob.name, i),
+            "content": content,
+            "file_name": blob.name,
+            "upload_date": blob.creation_time.isoformat() if hasattr(blob, "creation_time") and blob.creation_time else "",
+            "page": page_number(qa.get("page"), page_count)
+        }
+        documents.append(doc)
+    return documents
+
+# ---------------------------
+# Pipeline stages. Each item is a dict describing one blob that picks up fields as it moves along.
+# ---------------------------
+def blob_digest(blob):
+    # The etag changes whenever the blob is rewritten; last_modified covers sources without one.
+    return content_hash(blob.etag or "", blob.last_modified.isoformat() if blob.last_modified else "")
+
+def download_blob_item(source, blob, manifest):
+    index_name = generate_valid_id(blob.name, 0)
+    digest = blob_digest(blob)
+    if manifest is not None and manifest.is_unchanged(blob.name, digest, index_name):
+        print(f"Blob unchanged; skipping {blob.name}")
+        return None
+    item = {"blob": blob, "index_name": index_name, "digest": digest}
+    if blob.name.endswith(".pdf"):
+        item["data"] = source.read(blob.name)
+    else:
+        # Markdown is decoded as it streams in; only the text is kept.
+        item["text"] = extract_markdown_text(source.chunks(blob.name))
+    return item
+
+async def extract_blob_item(extractor, item):
+    if "data" in item:
+        pages = await extractor.pages(item.pop("data"))
+        item["page_count"] = len(pages)
+        item["text"] = join_pages(pages)
+    return item
+
+async def generate_blob_item(llm_client, item):
+    item["qa_pairs"] = await generate_qa_pairs(llm_client, item.pop("text"), item["blob"].name)
+    return item
+
+def upload_blob_item(uploader, manifest, item):
+    blob, index_name = item["blob"], item["index_name"]
+    if not item["qa_pairs"]:
+        # Not recorded in the manifest, so the blob is retried next run.
+        print(f"Failed to generate Q&A pairs for {blob.name}. Skipping.")
+        return None
+    documents = build_documents(blob, item["qa_pairs"], item.get("page_count"))
+    create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name)
+    upload_documents(uploader, index_name, documents)
+    if manifest is not None:
+        manifest.record(blob.name, item["digest"], index_name, [doc["id"] for doc in documents])
+    return item
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate Q&A indexes for the PDF and markdown files in a blob container or local directory.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip blobs whose etag and last-modified time match the index manifest from the last run.")
+    return parser.parse_args()
+
+async def main(args):
+    # FILE_SOURCE=blob (default) or local; see file_source.py.
+    source = open_file_source()
+    print(f"Retrieving files from {source}")
+    blobs = await asyncio.to_thread(lambda: list(source.list_files((".pdf", ".md"))))
+    print(f"Found {len(blobs)} file(s)")
+    manifest = IndexManifest(FILE_INDEX_MANIFEST_PATH) if args.incremental else None
+    uploader = BulkUploader(SEARCH_SERVICE_NAME, ADMIN_KEY)
+    try:
+        async with AsyncChatClient() as llm_client:
+            with PdfExtractor() as extractor:
+                # Downloads, page extraction, Q&A generation and uploads for different blobs all overlap;
+                # the pipeline's bounded queues keep only a few downloaded files in memory at a time.
+                pipeline = Pipeline("files")
+                pipeline.add_stage("download", lambda blob: download_blob_item(source, blob, manifest), workers=FILE_DOWNLOAD_WORKERS, blocking=True)
+                pipeline.add_stage("extract", lambda item: extract_blob_item(extractor, item), workers=extractor.workers)
+                pipeline.add_stage("generate", lambda item: generate_blob_item(llm_client, item), workers=LLM_MAX_CONCURRENCY)
+                pipeline.add_stage("upload", lambda item: upload_blob_item(uploader, manifest, item), workers=2, blocking=True)
+                await pipeline.run(blobs)
+        pipeline.print_stats()
+    finally:
+        uploader.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main(parse_args()))
@@ -1,29 +1,39 @@
 import os
 import re
-import time
 import json
 import ast
 import hashlib
+import asyncio
+import argparse
+import threading
 import requests
 from datetime import datetime, timezone
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service as EdgeService
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from azure.core.credentials import AzureKeyCredential
 from dotenv import load_dotenv
+from scraper_pool import ScraperPool
+from page_extract import parse_page
+from chunker import chunk_page, count_tokens
+from llm_client import AsyncChatClient, ChatCompletionError, LLM_MAX_CONCURRENCY
+from llm_cache import LLMCache
+from index_manifest import IndexManifest, content_hash, text_file_hash
+from transcript_parser import parse_transcript, segment_transcript
+from search_upload import BulkUploader, search_endpoint
+from pipeline import Pipeline
 
 load_dotenv()
 
 SEARCH_SERVICE_NAME = os.environ.get("SEARCH_SERVICE_NAME")
 ADMIN_KEY = os.environ.get("ADMIN_KEY")
-OPENAI_ENDPOINT = os.environ.get("OPENAI_ENDPOINT")
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-DEPLOYMENT_NAME = os.environ.get("DEPLOYMENT_NAME")
 API_VERSION = "2021-04-30-Preview"
+# Single index holding every source when running with --unified-index.
+UNIFIED_INDEX_NAME = os.environ.get("UNIFIED_INDEX_NAME", "antares-genie-unified")
+TRANSCRIPT_FOLDER = "Meeting Transcripts"
+# Transcript chunks packed into one enhancement request, up to this many input tokens (0 sends one chunk per request).
+# The cleaned text comes back about as long as it went in, so keep it under the 4000-token reply limit.
+ENHANCE_BATCH_TOKENS = int(os.environ.get("ENHANCE_BATCH_TOKENS", "3000"))
+ENHANCE_BATCH_MAX_CHUNKS = int(os.environ.get("ENHANCE_BATCH_MAX_CHUNKS", "8"))
+# Transcript segments enhanced and uploaded together; a transcript holds at most one such batch in memory.
+TRANSCRIPT_BATCH_SEGMENTS = int(os.environ.get("TRANSCRIPT_BATCH_SEGMENTS", str(4 * ENHANCE_BATCH_MAX_CHUNKS)))
 
 def generate_index_name(url_or_identifier):
     slug = url_or_identifier.replace("https://", "").replace("http://", "").replace("_", "-").lower()
@@ -51,18 +61,6 @@ def split_text_with_overlap(text, chunk_size=3000, overlap=300):
         start = end - overlap if end < text_length else text_length
     return chunks
 
-def scrape_authenticated_page(url):
-    options = webdriver.EdgeOptions()
-    driver = webdriver.Edge(options=options, service=EdgeService(EdgeChromiumDriverManager().install()))
-    driver.get(url)
-    try:
-        WebDriverWait(driver, 20).until(lambda d: d.find_element(By.ID, "_content"))
-    except Exception as e:
-        print("Warning: Main content not detected; proceeding anyway.", e)
-    html = driver.page_source
-    driver.quit()
-    return html
-
 def extract_title(html):
     soup = BeautifulSoup(html, 'html.parser')
     return soup.title.get_text().strip() if soup.title else ""
@@ -125,9 +123,12 @@ def extract_sections_from_article(html):
             sections.append({"title": "Untitled Section", "content": full_text})
     return sections
 
-def generate_qa_pairs(text_chunk, identifier, max_retries=3):
+QA_SYSTEM_PROMPT = "You are an AI assistant that generates detailed Q&A pairs from provided content."
+ENHANCE_SYSTEM_PROMPT = "You are an assistant that cleans up text."
+
+def build_qa_prompt(text_chunk):
     target = max(10, min(50, int(len(text_chunk) / 1000))) * 2
-    prompt = (
+    return (
         "You are called Antares Genie, an expert in engineering support for the Azure App Service Team led by Bilal Alam. "
         "Based solely on the **core content** provided below (ignore navigation menus, headers, footers, sidebars, and extraneous UI elements), "
         f"generate approximately {target} highly relevant question-answer pairs that are directly supported by the text. "
@@ -136,74 +137,57 @@ def generate_qa_pairs(text_chunk, identifier, max_retries=3):
         "Return your answer in JSON format as a list of objects, each with a 'question' field and an 'answer' field.\n\n"
         "Content:\n" + text_chunk
     )
-    headers = {"Content-Type": "application/json", "api-key": OPENAI_API_KEY}
-    data = {
-        "model": DEPLOYMENT_NAME,
-        "messages": [
-            {"role": "system", "content": "You are an AI assistant that generates detailed Q&A pairs from provided content."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 4000
-    }
-    attempt = 0
-    while attempt < max_retries:
-        response = requests.post(OPENAI_ENDPOINT, headers=headers, json=data)
-        if response.status_code == 429:
-            wait_time = 21
-            try:
-                error_msg = response.json().get("error", {}).get("message", "")
-                match = re.search(r"after (\d+) seconds", error_msg)
-                if match:
-                    wait_time = int(match.group(1))
-            except Exception:
-                pass
-            print(f"Rate limit exceeded. Waiting for {wait_time} seconds...")
-            time.sleep(wait_time)
-            attempt += 1
-            continue
-        try:
-            response_json = response.json()
-        except Exception as e:
-            print("Error parsing JSON:", e)
+
+def parse_qa_pairs(message_content):
+    message_content = message_content.strip()
+    if message_content.startswith("```json"):
+        message_content = message_content[len("```json"):].strip()
+    if message_content.endswith("```"):
+        message_content = message_content[:-3].strip()
+    message_content_clean = re.sub(r'[\x00-\x1F]+', ' ', message_content)
+    try:
+        qa_pairs = json.loads(message_content_clean)
+        if isinstance(qa_pairs, str):
+            qa_pairs = json.loads(qa_pairs)
+        if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
+            return qa_pairs
+        else:
+            print("Parsed Q&A pairs not in expected format:", qa_pairs)
             return []
-        message_content = response_json.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-        if message_content.startswith("```json"):
-            message_content = message_content[len("```json"):].strip()
-        if message_content.endswith("```"):
-            message_content = message_content[:-3].strip()
-        message_content_clean = re.sub(r'[\x00-\x1F]+', ' ', message_content)
+    except Exception as e:
+        print("Error parsing Q&A pairs:", e)
         try:
-            qa_pairs = json.loads(message_content_clean)
-            if isinstance(qa_pairs, str):
-                qa_pairs = json.loads(qa_pairs)
+            qa_pairs = ast.literal_eval(message_content_clean)
             if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
                 return qa_pairs
             else:
-                print("Parsed Q&A pairs not in expected format:", qa_pairs)
-                return []
-        except Exception as e:
-            print("Error parsing Q&A pairs:", e)
-            try:
-                qa_pairs = ast.literal_eval(message_content_clean)
-                if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
-                    return qa_pairs
-                else:
-                    print("AST literal_eval parsed Q&A pairs not in expected format:", qa_pairs)
-                    return []
-            except Exception as e2:
-                print("Error parsing Q&A pairs with ast.literal_eval:", e2)
-                match = re.search(r'\[.*\]', message_content_clean, re.DOTALL)
-                if match:
-                    trimmed = match.group(0)
-                    try:
-                        qa_pairs = json.loads(trimmed)
-                        if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
-                            return qa_pairs
-                    except Exception as e3:
-                        print("Error parsing trimmed Q&A pairs:", e3)
+                print("AST literal_eval parsed Q&A pairs not in expected format:", qa_pairs)
                 return []
-    print("Max retries reached for", identifier)
-    return []
+        except Exception as e2:
+            print("Error parsing Q&A pairs with ast.literal_eval:", e2)
+            match = re.search(r'\[.*\]', message_content_clean, re.DOTALL)
+            if match:
+                trimmed = match.group(0)
+                try:
+                    qa_pairs = json.loads(trimmed)
+                    if isinstance(qa_pairs, list) and all(isinstance(item, dict) for item in qa_pairs):
+                        return qa_pairs
+                except Exception as e3:
+                    print("Error parsing trimmed Q&A pairs:", e3)
+            return []
+
+async def generate_qa_pairs(llm_client, text_chunk, identifier):
+    prompt = build_qa_prompt(text_chunk)
+    try:
+        message_content = await llm_client.complete(QA_SYSTEM_PROMPT, prompt, max_tokens=4000, identifier=identifier)
+    except ChatCompletionError as e:
+        print("Max retries reached for", identifier, e)
+        return []
+    qa_pairs = parse_qa_pairs(message_content)
+    if not qa_pairs:
+        # Otherwise the cache would hand the same unusable reply to every later run and the page would never be retried.
+        await llm_client.forget(QA_SYSTEM_PROMPT, prompt, max_tokens=4000)
+    return qa_pairs
 
 def clean_transcript_text(raw_text):
     cleaned = re.sub(r'\d+:\d+:\d+|\d+:\d+', '', raw_text)
@@ -211,64 +195,104 @@ def clean_transcript_text(raw_text):
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     return cleaned
 
-def enhance_text_via_ai(text, identifier, max_retries=3):
+async def enhance_text_via_ai(llm_client, text, identifier):
     prompt = (
         "You are an AI assistant that improves text by correcting grammar, punctuation, and filling in missing words based on context, "
         "without altering the original meaning. Improve the following text and return the result as plain text:\n\n" + text
     )
-    headers = {"Content-Type": "application/json", "api-key": OPENAI_API_KEY}
-    data = {
-        "model": DEPLOYMENT_NAME,
-        "messages": [
-            {"role": "system", "content": "You are an assistant that cleans up text."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": 4000
-    }
-    attempt = 0
-    while attempt < max_retries:
-        response = requests.post(OPENAI_ENDPOINT, headers=headers, json=data)
-        if response.status_code == 429:
-            wait_time = 21
-            try:
-                error_msg = response.json().get("error", {}).get("message", "")
-                match = re.search(r"after (\d+) seconds", error_msg)
-                if match:
-                    wait_time = int(match.group(1))
-            except Exception:
-                pass
-            print(f"Rate limit exceeded (enhancement). Waiting for {wait_time} seconds...")
-            time.sleep(wait_time)
-            attempt += 1
-            continue
-        try:
-            response_json = response.json()
-            improved_text = response_json.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-            return improved_text
-        except Exception as e:
-            print("Error enhancing text via AI:", e)
-            attempt += 1
-    print("Max retries reached for text enhancement", identifier)
-    return text
+    try:
+        return await llm_client.complete(ENHANCE_SYSTEM_PROMPT, prompt, max_tokens=4000, identifier=identifier)
+    except ChatCompletionError as e:
+        print("Max retries reached for text enhancement", identifier, e)
+        return text
 
-def create_or_replace_index(service_name, admin_key, index_name):
+CHUNK_DELIMITER = re.compile(r'<<<CHUNK (\d+)>>>\s*(.*?)\s*<<<END CHUNK \1>>>', re.DOTALL)
+
+def build_enhance_batch_prompt(texts):
+    chunks = "\n\n".join(f"<<<CHUNK {i}>>>\n{text}\n<<<END CHUNK {i}>>>" for i, text in enumerate(texts, 1))
+    return (
+        "You are an AI assistant that improves text by correcting grammar, punctuation, and filling in missing words based on context, "
+        f"without altering the original meaning. Below are {len(texts)} separate chunks of a transcript, each between "
+        "<<<CHUNK n>>> and <<<END CHUNK n>>> markers. Improve every chunk on its own and return all of them as plain text, "
+        "each between the same markers with the same number, in the same order. Do not merge, skip or add chunks.\n\n" + chunks
+    )
+
+def split_enhance_batch_response(message_content, count):
+    # Chunk number -> improved text; missing or empty chunks are left out so the caller can retry them alone.
+    results = {}
+    for match in CHUNK_DELIMITER.finditer(message_content or ""):
+        number, text = int(match.group(1)), match.group(2).strip()
+        if 1 <= number <= count and text and number not in results:
+            results[number] = text
+    return results
+
+def pack_enhance_batches(texts, max_tokens=ENHANCE_BATCH_TOKENS, max_chunks=ENHANCE_BATCH_MAX_CHUNKS):
+    """
+    Group consecutive chunk indexes into batches of at most max_tokens input tokens and max_chunks
+    chunks. A chunk bigger than the budget gets a batch of its own.
     """
-    Create an index tailored for transcript and URL content.
+    batches, batch, batch_tokens = [], [], 0
+    for idx, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_chunks):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(idx)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+async def enhance_batch_via_ai(llm_client, texts, identifier):
+    if len(texts) == 1:
+        return [await enhance_text_via_ai(llm_client, texts[0], identifier)]
+    try:
+        message_content = await llm_client.complete(ENHANCE_SYSTEM_PROMPT, build_enhance_batch_prompt(texts), max_tokens=4000, identifier=identifier)
+    except ChatCompletionError as e:
+        print("Max retries reached for batched text enhancement", identifier, e)
+        message_content = ""
+    results = split_enhance_batch_response(message_content, len(texts))
+    missing = [i for i in range(1, len(texts) + 1) if i not in results]
+    if missing:
+        # A truncated or garbled reply only costs the chunks it lost, each retried on its own.
+        print(f"Batched enhancement {identifier} is missing chunk(s) {missing}; retrying them one at a time.")
+        retried = await asyncio.gather(*(enhance_text_via_ai(llm_client, texts[i - 1], f"{identifier}-{i}") for i in missing))
+        results.update(zip(missing, retried))
+    return [results[i] for i in range(1, len(texts) + 1)]
+
+async def enhance_texts_via_ai(llm_client, texts, identifier):
+    """
+    Enhance a list of transcript chunks, several per request when ENHANCE_BATCH_TOKENS allows,
+    and return the improved texts in the same order.
+    """
+    if ENHANCE_BATCH_TOKENS <= 0:
+        return await asyncio.gather(*(enhance_text_via_ai(llm_client, text, f"{identifier}-chunk{idx}") for idx, text in enumerate(texts)))
+    batches = pack_enhance_batches(texts)
+    results = await asyncio.gather(*(
+        enhance_batch_via_ai(llm_client, [texts[idx] for idx in batch], f"{identifier}-chunk{batch[0]}-{batch[-1]}") for batch in batches
+    ))
+    print(f"Enhanced {len(texts)} chunk(s) of {identifier} in {len(batches)} batch(es).")
+    return [text for batch_result in results for text in batch_result]
+
+def build_index_definition(index_name):
+    """
+    Index schema tailored for transcript and URL content.
     This schema includes documents for:
       - Q&A pairs (doc_type: "qa")
       - Raw content chunks (doc_type: "content")
     The semantic configuration prioritizes the 'title' field (if available) and 'content' field.
+    The unified index also facets on doc_type and page_title so queries can narrow by source type and page.
     """
-    url = f"https://{service_name}.search.windows.net/indexes/{index_name}?api-version={API_VERSION}"
-    headers = {"Content-Type": "application/json", "api-key": admin_key}
-    
+    unified = index_name == UNIFIED_INDEX_NAME
     fields = [
         {"name": "id", "type": "Edm.String", "searchable": True, "filterable": True,
          "retrievable": True, "sortable": True, "facetable": True, "key": True, "synonymMaps": []},
+        {"name": "source", "type": "Edm.String", "searchable": False, "filterable": True,
+         "retrievable": True, "sortable": True, "facetable": True, "key": False, "synonymMaps": []},
         {"name": "doc_type", "type": "Edm.String", "searchable": True, "filterable": True,
-         "retrievable": True, "sortable": False, "facetable": False, "key": False, "synonymMaps": []},
+         "retrievable": True, "sortable": False, "facetable": unified, "key": False, "synonymMaps": []},
         {"name": "page_title", "type": "Edm.String", "searchable": True, "filterable": True,
-         "retrievable": True, "sortable": True, "facetable": False, "key": False, "synonymMaps": []},
+         "retrievable": True, "sortable": True, "facetable": unified, "key": False, "synonymMaps": []},
         {"name": "title", "type": "Edm.String", "searchable": True, "filterable": True,
          "retrievable": True, "sortable": True, "facetable": True, "key": False, "synonymMaps": []},
         {"name": "content", "type": "Edm.String", "searchable": True, "filterable": True,
@@ -276,7 +300,12 @@ def create_or_replace_index(service_name, admin_key, index_name):
         {"name": "file_name", "type": "Edm.String", "searchable": True, "filterable": True,
          "retrievable": True, "sortable": True, "facetable": True, "key": False, "synonymMaps": []},
         {"name": "upload_date", "type": "Edm.DateTimeOffset", "searchable": False, "filterable": True,
-         "retrievable": True, "sortable": True, "facetable": True, "key": False, "synonymMaps": []}
+         "retrievable": True, "sortable": True, "facetable": True, "key": False, "synonymMaps": []},
+        # Where a transcript chunk sits in the recording ("1:02:15"), so answers can point at the moment.
+        {"name": "start_time", "type": "Edm.String", "searchable": False, "filterable": False,
+         "retrievable": True, "sortable": False, "facetable": False, "key": False, "synonymMaps": []},
+        {"name": "end_time", "type": "Edm.String", "searchable": False, "filterable": False,
+         "retrievable": True, "sortable": False, "facetable": False, "key": False, "synonymMaps": []}
     ]
     
     # Semantic configuration that prioritizes the title and content fields.
@@ -304,7 +333,16 @@ def create_or_replace_index(service_name, admin_key, index_name):
         "charFilters": [],
         "similarity": {"@odata.type": "#Microsoft.Azure.Search.BM25Similarity"}
     }
-    
+    return index_definition
+
+def create_or_replace_index(service_name, admin_key, index_name):
+    """
+    Delete the index if it exists and create it again from scratch.
+    """
+    url = f"{search_endpoint(service_name)}/indexes/{index_name}?api-version={API_VERSION}"
+    headers = {"Content-Type": "application/json", "api-key": admin_key}
+    index_definition = build_index_definition(index_name)
+
     delete_response = requests.delete(url, headers=headers)
     if delete_response.status_code in [200, 204]:
         print(f"Deleted existing index {index_name}")
@@ -317,171 +355,391 @@ def create_or_replace_index(service_name, admin_key, index_name):
     else:
         print(f"Failed to create index {index_name}: {create_response.text}")
 
+def ensure_index(service_name, admin_key, index_name):
+    """
+    Create the index if it is missing, leaving existing documents in place.
+    """
+    url = f"{search_endpoint(service_name)}/indexes/{index_name}?api-version={API_VERSION}"
+    headers = {"Content-Type": "application/json", "api-key": admin_key}
+    response = requests.put(url, headers=headers, json=build_index_definition(index_name))
+    if response.status_code == 201:
+        print(f"Created index {index_name} with semantic configuration.")
+    elif response.status_code not in [200, 204]:
+        print(f"Failed to create or update index {index_name}: {response.text}")
+
+_uploaders = {}
+_uploaders_lock = threading.Lock()
+
+def get_uploader(service_name, admin_key):
+    # One uploader (and connection pool) per service for the whole run; close_uploaders() ends them.
+    with _uploaders_lock:
+        if (service_name, admin_key) not in _uploaders:
+            _uploaders[(service_name, admin_key)] = BulkUploader(service_name, admin_key)
+        return _uploaders[(service_name, admin_key)]
+
+def close_uploaders():
+    with _uploaders_lock:
+        for uploader in _uploaders.values():
+            uploader.close()
+        _uploaders.clear()
+
+def report_upload(report):
+    print(report)
+    for key, message in report.failed[:10]:
+        print(f"  Failed {key}: {message}")
+    return report
+
 def upload_documents(service_name, admin_key, index_name, documents):
-    endpoint = f"https://{service_name}.search.windows.net"
-    from azure.search.documents import SearchClient
-    from azure.core.credentials import AzureKeyCredential
-    credential = AzureKeyCredential(admin_key)
-    search_client = SearchClient(endpoint=endpoint, index_name=index_name, credential=credential)
-    results = search_client.upload_documents(documents=documents)
-    print(f"Uploaded {len(documents)} documents to index {index_name}")
-    print("Upload results:", results)
-    return results
+    return report_upload(get_uploader(service_name, admin_key).upload(index_name, documents))
+
+def merge_or_upload_documents(service_name, admin_key, index_name, documents):
+    return report_upload(get_uploader(service_name, admin_key).merge_or_upload(index_name, documents))
+
+def delete_documents(service_name, admin_key, index_name, doc_ids):
+    return report_upload(get_uploader(service_name, admin_key).delete(index_name, doc_ids))
+
+def sync_source_documents(manifest, source, digest, index_name, documents):
+    """
+    Bring one source's documents in the index up to date without touching other sources:
+    merge the current documents and delete the ids this source no longer produces.
+    """
+    ensure_index(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name)
+    if documents:
+        merge_or_upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name, documents)
+    finish_source_sync(manifest, source, digest, index_name, [doc["id"] for doc in documents])
+
+def finish_source_sync(manifest, source, digest, index_name, doc_ids):
+    # Once all of a source's current documents are in the index: drop what it no longer produces and record it.
+    previous = manifest.get(source) or {}
+    if previous.get("index_name", index_name) != index_name:
+        # The source moved (e.g. to the unified index); its old copy goes entirely.
+        if previous.get("doc_ids"):
+            delete_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, previous["index_name"], previous["doc_ids"])
+    else:
+        stale_ids = manifest.stale_ids(source, doc_ids)
+        if stale_ids:
+            delete_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name, stale_ids)
+    manifest.record(source, digest, index_name, doc_ids)
+
+def prune_removed_sources(manifest, current_sources):
+    """
+    Delete the documents of sources that are no longer configured (URLs dropped from URLS,
+    transcripts removed from the folder) from the index they were recorded in, and forget them.
+    """
+    for source in manifest.missing_sources(current_sources):
+        entry = manifest.get(source) or {}
+        if entry.get("doc_ids") and entry.get("index_name"):
+            print(f"Source '{source}' is gone; deleting its {len(entry['doc_ids'])} document(s) from {entry['index_name']}")
+            delete_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, entry["index_name"], entry["doc_ids"])
+        manifest.remove(source)
+
+def upload_source(buffer, manifest, digest, index_name, replace_index=False):
+    """
+    Upload exactly one source's buffer. Incremental runs sync it against the manifest; full runs
+    upload it as-is, rebuilding the index first when the index belongs to this source alone.
+    """
+    if manifest is not None:
+        sync_source_documents(manifest, buffer.source, digest, index_name, buffer.documents)
+        return
+    if replace_index:
+        create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name)
+    upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name, buffer.documents)
+
+URLS = [
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/do-upgrade",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/raregionexpansion",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/fastdeployments/fastdeployments",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/msdp-deployment",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/msdp-deployment-stage",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/onboarding",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/troubleshoot_deployment",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/deployment-process",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/r2d-franchise-process",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/debug-deployments-start",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/rolepatcher",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/oncalltasks",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/do-debugger",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/configuration-story",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/tipsandtricks",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/ev2deploy-for-testing",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/minidash-minidashn",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/minidash-minidashn-troubleshooting",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/antreleasestopandstartcriteria",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/sdp/sdp",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/quotaincreases",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/groupquota",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/skucoremappings",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/skuavailability",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/raregionexpansion",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/asebuildout",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/asecapacity",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/selfservease",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/newstampbuildouts",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stampscapacitydata",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stampstateaciscommands",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stompupgradedeploymentblockers",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/falconteamdocs/testing/rdp/rdptovmss",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/telemetry",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/telemetrytroubleshooting",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/microsoftwebhostingtracing",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/kustogds",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/lockdowngenevatables",
+    # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/platformtelemetryoncall/telemetrychecklist",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustoclusterinfo",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotablesoverview",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresclouddeploymentevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresadmincontrollerevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresadmingeoevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdataserviceapitransactions",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdataservicecachechanges",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdeploylogs",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareshostroleevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresiislogfrontendtable",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresiislogworkertable",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimedataserviceevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimefrontendevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimeworkerevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimeworkersandboxevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareswebworkereventlogs",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareswebworkerfreblogs",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/applicationevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/defaultlogeventtable",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/deploymentevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/frontendthrottlerlogs",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/functionslogs",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/functionsmetrics",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/georegionserviceevents",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/kudu",
+    "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/roleinstanceheartbeat"
+]
+
+class SourceDocuments:
+    """
+    Document buffer owned by a single source (a page or a transcript file). Ids come from
+    the source's own id space, so a source only ever uploads its own documents and its ids
+    stay stable from one run to the next.
+    """
+    def __init__(self, source, page_title):
+        self.source = source
+        self.page_title = page_title
+        self.documents = []
+        self._next_index = 0
+
+    def add(self, doc_type, title, content, key=None, **fields):
+        if key is None:
+            key = self._next_index
+            self._next_index += 1
+        self.documents.append(dict(fields, **{
+            "id": generate_valid_id(self.source, key),
+            "source": self.source,
+            "doc_type": doc_type,
+            "page_title": self.page_title,
+            "title": title,
+            "content": content,
+            "file_name": self.source,
+            "upload_date": datetime.now(timezone.utc).isoformat()
+        }))
+
+    def ids(self):
+        return [doc["id"] for doc in self.documents]
+
+    def __len__(self):
+        return len(self.documents)
+
+def build_page_documents(url, page_title, content_chunks, qa_pairs):
+    buffer = SourceDocuments(url, page_title)
+    # Create documents for Q&A pairs
+    for qa in qa_pairs:
+        if not isinstance(qa, dict):
+            continue
+        question = " ".join(qa.get("question", "").split())
+        answer = " ".join(qa.get("answer", "").split())
+        if not question or not answer:
+            continue
+        buffer.add("qa", question, f"Question: {question}\nAnswer: {answer}")
+
+    # Also index the raw content chunks (full text from HTML)
+    for idx, chunk in enumerate(content_chunks):
+        buffer.add("content", f"{page_title} - Content Part {idx+1}", chunk, key=f"content-{idx}")
+    return buffer
+
+def build_transcript_documents(filename, segments, improved_chunks, first_index=0):
+    buffer = SourceDocuments(filename, filename)
+    for idx, (segment, improved_chunk) in enumerate(zip(segments, improved_chunks), first_index):
+        if not improved_chunk:
+            print(f"Warning: Chunk {idx+1} for {filename} returned empty result.")
+            continue
+        buffer.add("transcript_chunk", f"{filename} - Part {idx+1} ({segment.start_time}-{segment.end_time})", improved_chunk,
+                   key=f"{idx}", start_time=segment.start_time, end_time=segment.end_time)
+    return buffer
+
+# ---------------------------
+# URL pipeline stages. Each item is a dict describing one page that picks up fields as it moves along.
+# ---------------------------
+def fetch_page(scraper_pool, url):
+    html = scraper_pool.scrape(url)
+    return {"url": url, "html": html} if html else None
+
+def parse_page_item(item, manifest, unified_index=None):
+    page = parse_page(item.pop("html"))
+    digest = content_hash(page.title, page.main_text)
+    index_name = unified_index or generate_index_name(item["url"])
+    if manifest is not None and manifest.is_unchanged(item["url"], digest, index_name):
+        print(f"Page unchanged; skipping {item['url']}")
+        return None
+    item.update(page=page, digest=digest, index_name=index_name)
+    return item
+
+def chunk_page_item(item):
+    item["content_chunks"] = chunk_page(item["page"])
+    return item
+
+async def generate_page_item(llm_client, item):
+    # Generate Q&A pairs from the main content
+    item["qa_pairs"] = await generate_qa_pairs(llm_client, item["page"].main_text, item["url"])
+    return item
+
+def upload_page_item(item, manifest, unified_index=None):
+    url, page = item["url"], item["page"]
+    buffer = build_page_documents(url, page.title, item["content_chunks"], item["qa_pairs"])
+    # Leave the hash out when Q&A generation failed so the page is retried next run.
+    digest = item["digest"] if item["qa_pairs"] else None
+    # A per-page index belongs to this page alone and can be rebuilt; the unified index is shared.
+    upload_source(buffer, manifest, digest, item["index_name"], replace_index=unified_index is None)
+    return item
+
+async def index_urls(urls, llm_client, manifest=None, unified_index=None):
+    """
+    Scrape, summarize and index every URL through a staged pipeline. With a manifest, pages whose
+    content has not changed since the last run are dropped after parsing and changed pages are updated in place.
+    With unified_index, every page goes into that one index instead of an index of its own.
+    """
+    # Browsers are started once and shared across URLs.
+    with ScraperPool() as scraper_pool:
+        pipeline = Pipeline("urls")
+        pipeline.add_stage("fetch", lambda url: fetch_page(scraper_pool, url), workers=scraper_pool.workers, blocking=True)
+        pipeline.add_stage("parse", lambda item: parse_page_item(item, manifest, unified_index), workers=2, blocking=True)
+        pipeline.add_stage("chunk", chunk_page_item)
+        pipeline.add_stage("generate", lambda item: generate_page_item(llm_client, item), workers=LLM_MAX_CONCURRENCY)
+        pipeline.add_stage("upload", lambda item: upload_page_item(item, manifest, unified_index), workers=2, blocking=True)
+        await pipeline.run(urls)
+    pipeline.print_stats()
+
+# ---------------------------
+# Transcript pipeline stages. Each item is one transcript file, indexed a batch of segments at a time.
+# ---------------------------
+def read_transcript_item(filepath, manifest, transcript_index_name):
+    filename = os.path.basename(filepath)
+    digest = text_file_hash(filepath)
+    if manifest is not None and manifest.is_unchanged(filename, digest, transcript_index_name):
+        print(f"Transcript '{filename}' is unchanged; skipping.")
+        return None
+    return {"filename": filename, "path": filepath, "digest": digest}
+
+def transcript_batches(path, filename, batch_segments=TRANSCRIPT_BATCH_SEGMENTS):
+    # Parsed line by line from the open file and handed out batch_segments at a time, so only one batch is in memory.
+    with open(path, 'r', encoding='utf-8') as f:
+        batch = []
+        for segment in segment_transcript(parse_transcript(f, filename)):
+            batch.append(segment)
+            if len(batch) >= batch_segments:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+def upload_transcript_batch(buffer, manifest, transcript_index_name):
+    # Incremental runs merge into the index and delete stale ids once the whole file is in (finish_source_sync).
+    if manifest is not None:
+        ensure_index(SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name)
+        merge_or_upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name, buffer.documents)
+    else:
+        upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name, buffer.documents)
+
+async def index_transcript_item(llm_client, item, manifest, transcript_index_name):
+    """
+    Enhance and upload one transcript a batch of segments at a time: each batch is parsed,
+    enhanced (several requests at once, see enhance_texts_via_ai) and uploaded before the next
+    one is read, so a multi-hour recording never sits in memory whole.
+    """
+    filename = item["filename"]
+    batches = transcript_batches(item.pop("path"), filename)
+    doc_ids, segment_count = [], 0
+    while True:
+        segments = await asyncio.to_thread(next, batches, None)
+        if segments is None:
+            break
+        improved_chunks = await enhance_texts_via_ai(llm_client, [segment.text for segment in segments],
+                                                     f"{filename}-from{segment_count}")
+        buffer = build_transcript_documents(filename, segments, improved_chunks, segment_count)
+        if buffer.documents:
+            await asyncio.to_thread(upload_transcript_batch, buffer, manifest, transcript_index_name)
+        doc_ids.extend(buffer.ids())
+        segment_count += len(segments)
+    print(f"Transcript '{filename}' indexed as {segment_count} time-stamped chunk(s).")
+    if manifest is not None:
+        await asyncio.to_thread(finish_source_sync, manifest, filename, item["digest"], transcript_index_name, doc_ids)
+    return item
+
+def transcript_sources(transcript_folder):
+    return sorted(f for f in os.listdir(transcript_folder) if f.endswith(".txt"))
+
+async def index_transcripts(transcript_folder, llm_client, manifest=None, unified_index=None):
+    transcript_index_name = unified_index or generate_index_name("meeting-transcripts")
+    transcript_files = [os.path.join(transcript_folder, f) for f in transcript_sources(transcript_folder)]
+    print(f"Found {len(transcript_files)} transcript file(s) in '{transcript_folder}'.")
+    if manifest is None and unified_index is None:
+        # All transcripts share one index; rebuild it once and let each file upload its own chunks.
+        await asyncio.to_thread(create_or_replace_index, SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name)
+
+    pipeline = Pipeline("transcripts")
+    pipeline.add_stage("read", lambda path: read_transcript_item(path, manifest, transcript_index_name), blocking=True)
+    pipeline.add_stage("index", lambda item: index_transcript_item(llm_client, item, manifest, transcript_index_name), workers=2)
+    await pipeline.run(transcript_files)
+    pipeline.print_stats()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape docs and transcripts into Azure Cognitive Search indexes.")
+    parser.add_argument("--no-cache", action="store_true", help="Call the LLM for every prompt instead of using the on-disk response cache.")
+    parser.add_argument("--clear-cache", action="store_true", help="Empty the LLM response cache before running.")
+    parser.add_argument("--unified-index", action="store_true",
+                        help=f"Put every source into the single index named by UNIFIED_INDEX_NAME ({UNIFIED_INDEX_NAME}) instead of one index per URL.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only reprocess sources whose content changed since the last run (tracked in the index manifest) and update their indexes in place.")
+    return parser.parse_args()
+
+async def main(args):
+    llm_cache = None
+    if args.clear_cache or not args.no_cache:
+        llm_cache = LLMCache()
+        if args.clear_cache:
+            llm_cache.clear()
+            print(f"Cleared LLM cache at {llm_cache.path}")
+        if args.no_cache:
+            # --clear-cache --no-cache empties the cache and then runs without it.
+            llm_cache.close()
+            llm_cache = None
+    manifest = IndexManifest() if args.incremental else None
+    unified_index = UNIFIED_INDEX_NAME if args.unified_index else None
+    if unified_index and manifest is None:
+        # Full rebuild of the shared index happens once, before any source uploads into it.
+        create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, unified_index)
+    try:
+        # One client for the whole run so pages and transcript chunks share the connection pool and rate limits.
+        async with AsyncChatClient(cache=llm_cache) as llm_client:
+            # URLs and meeting transcripts run side by side so transcript enhancement overlaps with scraping.
+            await asyncio.gather(
+                index_urls(URLS, llm_client, manifest, unified_index),
+                index_transcripts(TRANSCRIPT_FOLDER, llm_client, manifest, unified_index)
+            )
+        if manifest is not None:
+            await asyncio.to_thread(prune_removed_sources, manifest, set(URLS) | set(transcript_sources(TRANSCRIPT_FOLDER)))
+    finally:
+        close_uploaders()
+        if llm_cache is not None:
+            print(llm_cache.stats())
+            llm_cache.close()
 
 # Main execution starts here.
 if __name__ == "__main__":
-    # ---------------------------
-    # Process URLs (if any)
-    # ---------------------------
-    url_documents = []
-    doc_index = 0
-    urls = [
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/do-upgrade",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/raregionexpansion",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/fastdeployments/fastdeployments",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/msdp-deployment",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/msdp-deployment-stage",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/onboarding",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/troubleshoot_deployment",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/deployment-process",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/r2d-franchise-process",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/debug-deployments-start",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/rolepatcher",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/oncalltasks",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/do-debugger",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/configuration-story",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/tipsandtricks",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/ev2deploy-for-testing",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/minidash-minidashn",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/minidash-minidashn-troubleshooting",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/deploymentteamdocs/antreleasestopandstartcriteria",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/sdp/sdp",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/quotaincreases",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/groupquota",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/skucoremappings",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/skuavailability",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/raregionexpansion",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/asebuildout",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/asecapacity",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/ase/selfservease",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/newstampbuildouts",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stampscapacitydata",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stampstateaciscommands",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/capacityteamdocs/stamps/stompupgradedeploymentblockers",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/falconteamdocs/testing/rdp/rdptovmss",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/telemetry",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/telemetrytroubleshooting",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/microsoftwebhostingtracing",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/kustogds",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/lockdowngenevatables",
-        # "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/telemetry/platformtelemetryoncall/telemetrychecklist",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustoclusterinfo",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotablesoverview",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresclouddeploymentevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresadmincontrollerevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresadmingeoevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdataserviceapitransactions",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdataservicecachechanges",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresdeploylogs",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareshostroleevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresiislogfrontendtable",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresiislogworkertable",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimedataserviceevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimefrontendevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimeworkerevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antaresruntimeworkersandboxevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareswebworkereventlogs",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/antareswebworkerfreblogs",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/applicationevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/defaultlogeventtable",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/deploymentevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/frontendthrottlerlogs",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/functionslogs",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/functionsmetrics",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/georegionserviceevents",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/kudu",
-        "https://eng.ms/docs/cloud-ai-platform/devdiv/serverless-paas-balam/serverless-paas-vikr/app-service-web-apps/app-service-team-documents/generalteamdocs/documentation/kusto/kustotabledocumentation/roleinstanceheartbeat"
-    ]
-    
-    for url in urls:
-        html = scrape_authenticated_page(url)
-        if html:
-            page_title = extract_title(html)
-            main_content = extract_main_content(html)
-            # Generate Q&A pairs from the main content
-            qa_pairs = generate_qa_pairs(main_content, url)
-            # Create documents for Q&A pairs
-            for qa in qa_pairs:
-                if not isinstance(qa, dict):
-                    continue
-                question = " ".join(qa.get("question", "").split())
-                answer = " ".join(qa.get("answer", "").split())
-                if not question or not answer:
-                    continue
-                doc = {
-                    "id": generate_valid_id(url, doc_index),
-                    "doc_type": "qa",
-                    "page_title": page_title,
-                    "title": question,
-                    "content": f"Question: {question}\nAnswer: {answer}",
-                    "file_name": url,
-                    "upload_date": datetime.now(timezone.utc).isoformat()
-                }
-                url_documents.append(doc)
-                doc_index += 1
-            
-            # Also split the raw content (full text from HTML) into chunks with overlap
-            content_chunks = split_text_with_overlap(main_content, chunk_size=3000, overlap=300)
-            for idx, chunk in enumerate(content_chunks):
-                doc = {
-                    "id": generate_valid_id(url, f"content-{idx}"),
-                    "doc_type": "content",
-                    "page_title": page_title,
-                    "title": f"{page_title} - Content Part {idx+1}",
-                    "content": chunk,
-                    "file_name": url,
-                    "upload_date": datetime.now(timezone.utc).isoformat()
-                }
-                url_documents.append(doc)
-                doc_index += 1
-            
-            index_name_final = generate_index_name(url)
-            create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name_final)
-            upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, index_name_final, url_documents)
-    
-    # ---------------------------
-    # Process Meeting Transcript .txt files
-    # ---------------------------
-    transcript_documents = []
-    transcript_folder = "Meeting Transcripts"
-    transcript_files = [f for f in os.listdir(transcript_folder) if f.endswith(".txt")]
-    print(f"Found {len(transcript_files)} transcript file(s) in '{transcript_folder}'.")
-    
-    for filename in transcript_files:
-        filepath = os.path.join(transcript_folder, filename)
-        with open(filepath, 'r', encoding='utf-8') as f:
-            raw_transcript = f.read()
-        cleaned_text = clean_transcript_text(raw_transcript)
-        chunks = split_text_with_overlap(cleaned_text, chunk_size=3000, overlap=300)
-        print(f"Transcript '{filename}' split into {len(chunks)} chunk(s) with overlap.")
-        for idx, chunk in enumerate(chunks):
-            print(f"Enhancing chunk {idx+1}/{len(chunks)} for {filename} (length: {len(chunk)})...")
-            improved_chunk = enhance_text_via_ai(chunk, f"{filename}-chunk{idx}")
-            if not improved_chunk:
-                print(f"Warning: Chunk {idx+1} for {filename} returned empty result.")
-                continue
-            doc = {
-                "id": generate_valid_id(filename, f"{idx}"),
-                "doc_type": "transcript_chunk",
-                "page_title": filename,
-                "title": f"{filename} - Part {idx+1}",
-                "content": improved_chunk,
-                "file_name": filename,
-                "upload_date": datetime.now(timezone.utc).isoformat()
-            }
-            transcript_documents.append(doc)
-    
-    print(f"Total transcript chunk documents to upload: {len(transcript_documents)}")
-    transcript_index_name = generate_index_name("meeting-transcripts")
-    create_or_replace_index(SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name)
-    upload_documents(SEARCH_SERVICE_NAME, ADMIN_KEY, transcript_index_name, transcript_documents)
\ No newline at end of file
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,140 @@
+import os
+import codecs
+import asyncio
+import multiprocessing
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Processes extracting PDF pages; 1 extracts in a thread of the calling process instead.
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+# PDFs shorter than this are not worth splitting; each worker parses the whole document structure.
+PDF_MIN_PAGES_PER_TASK = int(os.environ.get("PDF_MIN_PAGES_PER_TASK", "16"))
+
+@dataclass
+class PdfPage:
+    number: int
+    text: str
+
+def pdf_pages(data):
+    """
+    Yield the text of each page of a PDF held in memory. MuPDF reads the buffer in place,
+    so no temporary file is needed; the caller still holds the PDF's bytes throughout.
+    """
+    with fitz.open(stream=data, filetype="pdf") as document:
+        for page in document:
+            yield page.get_text()
+
+def extract_pdf_text(data):
+    return " ".join(pdf_pages(data))
+
+def pdf_page_count(data):
+    with fitz.open(stream=data, filetype="pdf") as document:
+        return document.page_count
+
+def extract_pdf_page_range(data, start, stop):
+    # Runs in a worker process: opens its own copy of the document and reads pages [start, stop).
+    with fitz.open(stream=data, filetype="pdf") as document:
+        return [PdfPage(number + 1, document[number].get_text()) for number in range(start, stop)]
+
+def extract_shared_pdf_page_range(name, size, start, stop):
+    # Runs in a worker process: reads the PDF from the parent's shared-memory copy instead of receiving its bytes.
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        buffer = shared.buf[:size]
+        try:
+            return extract_pdf_page_range(buffer, start, stop)
+        finally:
+            buffer.release()
+    finally:
+        shared.close()
+
+def share_bytes(data):
+    shared = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shared.buf[:len(data)] = data
+    return shared
+
+def page_ranges(page_count, workers, min_pages=PDF_MIN_PAGES_PER_TASK):
+    tasks = max(1, min(workers, page_count // max(1, min_pages)))
+    size, extra = divmod(page_count, tasks)
+    ranges, start = [], 0
+    for i in range(tasks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def join_pages(pages):
+    # The markers let the Q&A prompt attribute every pair to the page it came from.
+    return "\n".join(f"[Page {page.number}]\n{page.text}" for page in pages)
+
+def decode_chunks(chunks, encoding="utf-8"):
+    # Incremental, so a multi-byte character split across two chunks still decodes.
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+def extract_markdown_text(chunks):
+    return "".join(decode_chunks(chunks))
+
+def extract_file_text(source, file):
+    """
+    Text of a .pdf or .md file from a file source (see file_source.py), extracted without
+    writing it to disk. The whole text is returned as one string, so a file costs its bytes
+    plus its text in memory; Q&A generation needs all of it at once anyway.
+    """
+    if file.name.endswith(".pdf"):
+        return extract_pdf_text(source.read(file.name))
+    return extract_markdown_text(source.chunks(file.name))
+
+class PdfExtractor:
+    """
+    Page-level PDF extraction on a process pool. A long PDF is split into contiguous page
+    ranges, one per worker, and the pages come back in order with their 1-based numbers.
+    The PDF is copied once into shared memory for the workers rather than pickled to each.
+    Extraction is awaited, so the event loop keeps serving LLM calls for the previous file
+    while the next one is being extracted.
+    """
+    def __init__(self, workers=PDF_EXTRACT_WORKERS, min_pages_per_task=PDF_MIN_PAGES_PER_TASK):
+        self.workers = max(1, workers)
+        self.min_pages_per_task = min_pages_per_task
+        # Spawned, not forked: workers start while download and page-count threads may hold locks
+        # (MuPDF's, the shared-memory resource tracker's) that a forked child would inherit held.
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn")) if self.workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def pages(self, data):
+        page_count = await asyncio.to_thread(pdf_page_count, data)
+        ranges = page_ranges(page_count, self.workers, self.min_pages_per_task)
+        if self.pool is None or len(ranges) == 1:
+            return await asyncio.to_thread(extract_pdf_page_range, data, 0, page_count)
+        loop = asyncio.get_running_loop()
+        shared = await asyncio.to_thread(share_bytes, data)
+        try:
+            parts = await asyncio.gather(*(loop.run_in_executor(self.pool, extract_shared_pdf_page_range,
+                                                                shared.name, len(data), start, stop)
+                                           for start, stop in ranges))
+        finally:
+            shared.close()
+            shared.unlink()
+        return [page for part in parts for page in part]
+
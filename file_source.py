@@ -0,0 +1,96 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where create-file-indices reads its files from: "blob" (Azure Storage, or Azurite with
+# BLOB_CONNECTION_STRING=UseDevelopmentStorage=true) or "local" (a directory, FILE_SOURCE_DIR).
+FILE_SOURCE = os.environ.get("FILE_SOURCE", "blob")
+FILE_SOURCE_DIR = os.environ.get("FILE_SOURCE_DIR", "files")
+BLOB_CONNECTION_STRING = os.environ.get("BLOB_CONNECTION_STRING")
+CONTAINER_NAME = os.environ.get("CONTAINER_NAME")
+# Size of the pieces chunks() hands out for local files; blobs come in the SDK's download chunks.
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+# Blobs larger than one range are downloaded as ranges of this size, BLOB_DOWNLOAD_CONCURRENCY at a time.
+BLOB_RANGE_BYTES = int(os.environ.get("BLOB_RANGE_BYTES", str(4 * 1024 * 1024)))
+BLOB_DOWNLOAD_CONCURRENCY = int(os.environ.get("BLOB_DOWNLOAD_CONCURRENCY", "4"))
+
+@dataclass
+class SourceFile:
+    name: str
+    size: int = 0
+    creation_time: datetime = None
+    last_modified: datetime = None
+    etag: str = ""
+
+class BlobContainerSource:
+    """
+    Files in a blob container. read() downloads a blob straight into memory, in parallel
+    ranges when it is large, and chunks() streams it, so nothing is written to disk on the
+    way to extraction. The client is thread-safe and shared by every download worker.
+    """
+    def __init__(self, connection_string=BLOB_CONNECTION_STRING, container_name=CONTAINER_NAME,
+                 range_bytes=BLOB_RANGE_BYTES, download_concurrency=BLOB_DOWNLOAD_CONCURRENCY):
+        from azure.storage.blob import BlobServiceClient
+        self.container_name = container_name
+        self.download_concurrency = download_concurrency
+        service_client = BlobServiceClient.from_connection_string(
+            connection_string, max_single_get_size=range_bytes, max_chunk_get_size=range_bytes)
+        self.container_client = service_client.get_container_client(container_name)
+
+    def __str__(self):
+        return f"container {self.container_name}"
+
+    def list_files(self, suffixes=()):
+        for blob in self.container_client.list_blobs():
+            if not suffixes or blob.name.endswith(tuple(suffixes)):
+                yield SourceFile(blob.name, blob.size, blob.creation_time, blob.last_modified, blob.etag)
+
+    def read(self, name):
+        return self.container_client.download_blob(name, max_concurrency=self.download_concurrency).readall()
+
+    def chunks(self, name):
+        return self.container_client.download_blob(name).chunks()
+
+class LocalDirSource:
+    """
+    Files under a local directory, named by their path relative to it, for indexing
+    without a storage account.
+    """
+    def __init__(self, root=FILE_SOURCE_DIR):
+        self.root = root
+
+    def __str__(self):
+        return f"directory {self.root}"
+
+    def list_files(self, suffixes=()):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not suffixes or name.endswith(tuple(suffixes)):
+                    stat = os.stat(path)
+                    modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                    yield SourceFile(name, stat.st_size, modified, modified, f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), "rb") as f:
+            return f.read()
+
+    def chunks(self, name):
+        with open(os.path.join(self.root, name), "rb") as f:
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    return
+                yield chunk
+
+def open_file_source(kind=FILE_SOURCE):
+    if kind == "local":
+        return LocalDirSource()
+    if kind == "blob":
+        return BlobContainerSource()
+    raise ValueError(f"Unknown FILE_SOURCE {kind!r}; expected 'blob' or 'local'")
@@ -0,0 +1,31 @@
+'''
+Production server for the bot:
+
+    gunicorn "query_agent:create_app()"    (or the equivalent gunicorn query_agent:APP)
+
+Every worker is its own process with its own event loop, HTTP session, search client
+and token cache, created after the fork: preload_app is off, so each worker imports
+query_agent (and builds APP) itself. Metrics on /metrics are per
+worker.
+'''
+
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '3978')}"
+worker_class = "aiohttp.GunicornWebWorker"
+# App Service sets WEB_CONCURRENCY when it knows better; otherwise one worker per core.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Workers must not share sockets or sessions opened before the fork.
+preload_app = False
+
+# On SIGTERM a worker stops accepting connections, drains in-flight turns (DRAIN_SECONDS)
+# and exits; gunicorn kills it after graceful_timeout, so keep that above DRAIN_SECONDS.
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+# A streamed answer keeps the request open for as long as the LLM takes.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+keepalive = 75
+
+accesslog = "-" if os.environ.get("LOG_ACCESS", "false").lower() == "true" else None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
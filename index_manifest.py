@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INDEX_MANIFEST_PATH = os.environ.get("INDEX_MANIFEST_PATH", "index-manifest.json")
+
+def content_hash(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def text_file_hash(path, block_chars=1024 * 1024):
+    # The same digest as content_hash(f.read()), without holding the whole file in memory.
+    h = hashlib.sha256()
+    with open(path, "r", encoding="utf-8") as f:
+        for block in iter(lambda: f.read(block_chars), ""):
+            h.update(block.encode("utf-8"))
+    h.update(b"\0")
+    return h.hexdigest()
+
+class IndexManifest:
+    """
+    Local record of what has been indexed for each source (URL, transcript file, ...):
+    the hash of its content, the index it went into, the document ids uploaded for it
+    and when that happened. Safe to record into from several upload threads at once.
+    """
+    def __init__(self, path=INDEX_MANIFEST_PATH):
+        self.path = path
+        self.sources = {}
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.sources = json.load(f).get("sources", {})
+
+    def get(self, source):
+        return self.sources.get(source)
+
+    def is_unchanged(self, source, digest, index_name):
+        entry = self.sources.get(source)
+        return bool(entry) and entry.get("content_hash") == digest and entry.get("index_name") == index_name
+
+    def stale_ids(self, source, doc_ids):
+        entry = self.sources.get(source) or {}
+        return sorted(set(entry.get("doc_ids", [])) - set(doc_ids))
+
+    def record(self, source, digest, index_name, doc_ids):
+        with self._lock:
+            self.sources[source] = {
+                "content_hash": digest,
+                "index_name": index_name,
+                "doc_ids": list(doc_ids),
+                "last_indexed": datetime.now(timezone.utc).isoformat()
+            }
+            self.save()
+
+    def remove(self, source):
+        with self._lock:
+            if self.sources.pop(source, None) is not None:
+                self.save()
+
+    def missing_sources(self, current_sources):
+        # Sources recorded by an earlier run that this run no longer has (a URL dropped from the list, a deleted file).
+        with self._lock:
+            return sorted(set(self.sources) - set(current_sources))
+
+    def save(self):
+        # Write to a temporary file first so an interrupted run never leaves a truncated manifest.
+        # The temp file is unique, so even a second process saving the same manifest cannot collide with it.
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".index-manifest-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"sources": self.sources}, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+
+import aiohttp
+from dotenv import load_dotenv
+from llm_cache import cache_key
+
+load_dotenv()
+
+OPENAI_ENDPOINT = os.environ.get("OPENAI_ENDPOINT")
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+DEPLOYMENT_NAME = os.environ.get("DEPLOYMENT_NAME")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "480"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "80000"))
+
+# Azure OpenAI enforces its per-minute quotas over short windows, so only allow
+# a burst of roughly ten seconds' worth of budget.
+BURST_SECONDS = 10
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+class ChatCompletionError(Exception):
+    pass
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English prose.
+    return len(text) // 4 + 1
+
+class TokenBucket:
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        # Waiters queue on the lock, so the budget is handed out first come, first served.
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+def retry_after_seconds(response, body):
+    for header, scale in (("retry-after-ms", 0.001), ("Retry-After", 1)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                pass
+    if isinstance(body, dict):
+        message = body.get("error", {}).get("message", "")
+        match = re.search(r"after (\d+) seconds", message)
+        if match:
+            return int(match.group(1))
+    return None
+
+def message_content(body):
+    # A content-filtered reply comes back with no choices and a refused one with a null content; neither is text.
+    choices = body.get("choices") if isinstance(body, dict) else None
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        raise ChatCompletionError(f"Chat completion returned no choices: {body}")
+    content = (choices[0].get("message") or {}).get("content")
+    if not isinstance(content, str):
+        raise ChatCompletionError(f"Chat completion returned no content (finish_reason={choices[0].get('finish_reason')})")
+    return content.strip()
+
+class AsyncChatClient:
+    """
+    Shared chat-completions client. Many requests can be in flight at once over one
+    pooled session while requests- and tokens-per-minute budgets are enforced locally.
+    """
+    def __init__(self, endpoint=OPENAI_ENDPOINT, api_key=OPENAI_API_KEY, deployment=DEPLOYMENT_NAME,
+                 max_concurrency=LLM_MAX_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_retries=5, backoff_base=1.0,
+                 backoff_max=60.0, timeout=120, session=None, cache=None, token_provider=None):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.deployment = deployment
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = session
+        self._owns_session = session is None
+        self._paused_until = 0.0
+        self.cache = cache
+        # With a token provider (managed identity) requests carry a bearer token instead of the api-key.
+        self.token_provider = token_provider
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    def _backoff(self, attempt):
+        # Full jitter keeps retries from a burst of 429s from lining up again.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _wait_for_pause(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.token_provider is not None:
+            headers["Authorization"] = await self.token_provider.authorization_header()
+        elif self.api_key:
+            headers["api-key"] = self.api_key
+        return headers
+
+    def _payload(self, system_prompt, user_prompt, max_tokens, stream=False):
+        data = {
+            "model": self.deployment,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": max_tokens
+        }
+        if stream:
+            data["stream"] = True
+        return data
+
+    async def _acquire(self, token_cost):
+        await self._wait_for_pause()
+        await self.request_bucket.acquire()
+        await self.token_bucket.acquire(token_cost)
+
+    async def _retry_delay(self, status, wait_time, attempt, identifier):
+        if wait_time is None:
+            wait_time = self._backoff(attempt)
+        if status == 429:
+            # Hold back every caller, not just this one, until the service says it is ready again.
+            self._paused_until = max(self._paused_until, time.monotonic() + wait_time)
+        logger.warning(f"Chat request for {identifier} returned {status}. Retrying in {wait_time:.1f}s...")
+        await asyncio.sleep(wait_time)
+
+    async def forget(self, system_prompt, user_prompt, max_tokens=4000):
+        """
+        Drop the cached reply to this request, e.g. one the caller could not use, so the next call asks the model again.
+        """
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.delete, cache_key(self.deployment, system_prompt, user_prompt, max_tokens))
+
+    async def complete(self, system_prompt, user_prompt, max_tokens=4000, identifier=""):
+        """
+        Return the assistant message content. Raises ChatCompletionError once retries are exhausted,
+        or at once for a reply without text (content filtered, null content).
+        Identical requests are answered from the cache, when one is configured, without touching the rate limits.
+        """
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.deployment, system_prompt, user_prompt, max_tokens)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached
+
+        data = self._payload(system_prompt, user_prompt, max_tokens)
+        token_cost = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + max_tokens
+
+        last_error = None
+        for attempt in range(self.max_retries):
+            await self._acquire(token_cost)
+            try:
+                async with self._semaphore:
+                    async with self.session.post(self.endpoint, headers=await self._headers(), json=data, timeout=self.timeout) as response:
+                        try:
+                            body = await response.json(content_type=None)
+                        except ValueError:
+                            body = None
+                        status = response.status
+                        wait_time = retry_after_seconds(response, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                wait_time = self._backoff(attempt)
+                logger.warning(f"Chat request failed for {identifier} ({e}). Retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+                continue
+
+            if status == 200 and isinstance(body, dict):
+                try:
+                    content = message_content(body)
+                except ChatCompletionError as e:
+                    raise ChatCompletionError(f"Chat completion failed for {identifier}: {e}") from e
+                if key is not None and content:
+                    await asyncio.to_thread(self.cache.put, key, content)
+                return content
+            last_error = f"HTTP {status}: {body}"
+            if status not in RETRYABLE_STATUSES:
+                break
+            await self._retry_delay(status, wait_time, attempt, identifier)
+        raise ChatCompletionError(f"Chat completion failed for {identifier}: {last_error}")
+
+    async def stream(self, system_prompt, user_prompt, max_tokens=4000, identifier=""):
+        """
+        Yield the assistant message as it is generated, one content delta at a time, from the
+        service's server-sent-events stream. Failures before the first delta are retried like
+        complete(); once text has been yielded a failure raises ChatCompletionError.
+        """
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.deployment, system_prompt, user_prompt, max_tokens)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                yield cached
+                return
+
+        data = self._payload(system_prompt, user_prompt, max_tokens, stream=True)
+        token_cost = estimate_tokens(system_prompt) + estimate_tokens(user_prompt) + max_tokens
+
+        last_error = None
+        for attempt in range(self.max_retries):
+            await self._acquire(token_cost)
+            parts = []
+            try:
+                async with self._semaphore:
+                    async with self.session.post(self.endpoint, headers=await self._headers(), json=data, timeout=self.timeout) as response:
+                        if response.status != 200:
+                            try:
+                                body = await response.json(content_type=None)
+                            except ValueError:
+                                body = None
+                            status, wait_time = response.status, retry_after_seconds(response, body)
+                        else:
+                            async for delta in sse_deltas(response):
+                                parts.append(delta)
+                                yield delta
+                            if key is not None and parts:
+                                await asyncio.to_thread(self.cache.put, key, "".join(parts).strip())
+                            return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if parts:
+                    raise ChatCompletionError(f"Chat stream for {identifier} broke off: {e}") from e
+                last_error = e
+                wait_time = self._backoff(attempt)
+                logger.warning(f"Chat request failed for {identifier} ({e}). Retrying in {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+                continue
+
+            last_error = f"HTTP {status}: {body}"
+            if status not in RETRYABLE_STATUSES:
+                break
+            await self._retry_delay(status, wait_time, attempt, identifier)
+        raise ChatCompletionError(f"Chat completion failed for {identifier}: {last_error}")
+
+async def sse_deltas(response):
+    """
+    Yield the content deltas of a chat-completions server-sent-events response.
+    """
+    async for raw_line in response.content:
+        line = raw_line.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        try:
+            chunk = json.loads(payload)
+        except ValueError:
+            continue
+        # Azure sends a first chunk with no choices that only carries the prompt filter results.
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
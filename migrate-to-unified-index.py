@@ -0,0 +1,105 @@
+'''
+Copy every document from the existing per-URL and transcript indexes into the unified
+index (UNIFIED_INDEX_NAME), filling in the `source` field from each document's file_name.
+Only the indexes create_index.py builds (one per URL in URLS plus meeting-transcripts) are
+migrated unless --indexes or --prefix names others; other indexes on the service are left alone.
+
+    python migrate-to-unified-index.py [--indexes NAME ...] [--prefix PREFIX] [--delete-old] [--dry-run]
+'''
+
+import os
+import argparse
+import requests
+from dotenv import load_dotenv
+from create_index import API_VERSION, UNIFIED_INDEX_NAME, URLS, build_index_definition, ensure_index, generate_index_name
+from search_upload import BulkUploader, search_endpoint
+
+load_dotenv()
+
+SEARCH_SERVICE_NAME = os.environ.get("SEARCH_SERVICE_NAME")
+ADMIN_KEY = os.environ.get("ADMIN_KEY")
+PAGE_SIZE = 1000
+
+UNIFIED_FIELDS = {field["name"] for field in build_index_definition(UNIFIED_INDEX_NAME)["fields"]}
+
+def list_index_names(session, endpoint):
+    response = session.get(f"{endpoint}/indexes?api-version={API_VERSION}&$select=name")
+    response.raise_for_status()
+    return [index["name"] for index in response.json().get("value", [])]
+
+def source_index_names(existing, indexes=None, prefix=None):
+    """
+    The indexes to migrate: the ones named with --indexes and/or starting with --prefix, or by
+    default the per-URL and transcript indexes create_index.py generates. Only existing indexes
+    are returned, and never the unified index itself.
+    """
+    if indexes or prefix:
+        wanted = set(indexes or [])
+        selected = [name for name in existing if name in wanted or (prefix and name.startswith(prefix))]
+    else:
+        known = {generate_index_name(url) for url in URLS} | {generate_index_name("meeting-transcripts")}
+        selected = [name for name in existing if name in known]
+    return [name for name in selected if name != UNIFIED_INDEX_NAME]
+
+def read_documents(session, endpoint, index_name):
+    # Page by key rather than by skip: skip is capped at 100000 and shifts if the index changes mid-read.
+    last_id = None
+    while True:
+        body = {"search": "*", "top": PAGE_SIZE, "orderby": "id"}
+        if last_id is not None:
+            body["filter"] = "id gt '{}'".format(last_id.replace("'", "''"))
+        response = session.post(f"{endpoint}/indexes/{index_name}/docs/search?api-version={API_VERSION}", json=body)
+        response.raise_for_status()
+        documents = response.json().get("value", [])
+        if documents:
+            yield documents
+        if len(documents) < PAGE_SIZE:
+            return
+        last_id = documents[-1]["id"]
+
+def to_unified_document(doc, index_name):
+    unified = {k: v for k, v in doc.items() if k in UNIFIED_FIELDS}
+    unified["source"] = doc.get("source") or doc.get("file_name") or index_name
+    return unified
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate per-URL indexes into the unified index.")
+    parser.add_argument("--indexes", nargs="+", help="Migrate exactly these indexes instead of the ones create_index.py generates.")
+    parser.add_argument("--prefix", help="Also migrate every index whose name starts with this prefix.")
+    parser.add_argument("--delete-old", action="store_true", help="Delete each source index once all of its documents were copied.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be copied.")
+    args = parser.parse_args()
+
+    endpoint = search_endpoint(SEARCH_SERVICE_NAME)
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json", "api-key": ADMIN_KEY or ""})
+    uploader = BulkUploader(SEARCH_SERVICE_NAME, ADMIN_KEY)
+    if not args.dry_run:
+        ensure_index(SEARCH_SERVICE_NAME, ADMIN_KEY, UNIFIED_INDEX_NAME)
+
+    index_names = source_index_names(list_index_names(session, endpoint), args.indexes, args.prefix)
+    print(f"Migrating {len(index_names)} index(es) into {UNIFIED_INDEX_NAME}")
+    total = 0
+    for index_name in index_names:
+        copied, failed = 0, 0
+        for page in read_documents(session, endpoint, index_name):
+            documents = [to_unified_document(doc, index_name) for doc in page]
+            if args.dry_run:
+                copied += len(documents)
+                continue
+            report = uploader.merge_or_upload(UNIFIED_INDEX_NAME, documents)
+            copied += report.succeeded
+            failed += len(report.failed)
+        total += copied
+        print(f"{index_name}: {copied} document(s) {'to copy' if args.dry_run else 'copied'}, {failed} failed")
+        if args.delete_old and not args.dry_run and not failed:
+            response = session.delete(f"{endpoint}/indexes/{index_name}?api-version={API_VERSION}")
+            if response.status_code in [200, 204]:
+                print(f"Deleted index {index_name}")
+            else:
+                print(f"Failed to delete index {index_name}: {response.text}")
+    print(f"Migrated {total} document(s) into {UNIFIED_INDEX_NAME}")
+    uploader.close()
+
+if __name__ == "__main__":
+    main()
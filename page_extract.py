@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+UNWANTED_TAGS = ['nav', 'header', 'footer', 'aside', 'script', 'style']
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+@dataclass
+class Page:
+    title: str = ""
+    main_text: str = ""
+    sections: list = field(default_factory=list)
+    links: list = field(default_factory=list)
+
+def parse_page(html, parser=HTML_PARSER):
+    """
+    Parse a scraped page once and pull out everything the indexer needs: the title,
+    the cleaned main text, the article sections and the links inside the content.
+    """
+    soup = BeautifulSoup(html, parser)
+    page = Page(title=soup.title.get_text().strip() if soup.title else "")
+    article = soup.find('article', id="_content")
+    if article:
+        for unwanted in article.find_all(UNWANTED_TAGS):
+            unwanted.decompose()
+        page.main_text = article.get_text(separator="\n").strip()
+        page.links = _links(article)
+        # Section extraction strips headings out of the tree, so it has to run last.
+        page.sections = _article_sections(article)
+    else:
+        paragraphs = soup.find_all('p')
+        texts = [p.get_text(separator=" ").strip() for p in paragraphs if p.get_text().strip()]
+        page.main_text = "\n".join(texts) if texts else soup.get_text(separator="\n").strip()
+        page.links = _links(soup)
+        for i, p in enumerate(paragraphs):
+            text = p.get_text(separator=" ", strip=True)
+            if text:
+                page.sections.append({"title": f"Section {i+1}", "content": text})
+        if not page.sections:
+            page.sections.append({"title": "Untitled Section", "content": soup.get_text(separator="\n").strip()})
+    return page
+
+def _links(root):
+    return [{"text": a.get_text(strip=True), "href": a["href"]} for a in root.find_all('a', href=True)]
+
+def _article_sections(article):
+    sections = []
+    h2_containers = article.find_all("div", class_=lambda x: x and "h2-container" in x)
+    if h2_containers:
+        for i, container in enumerate(h2_containers):
+            h_heading = container.find(HEADING_TAGS)
+            sec_title = h_heading.get_text(strip=True) if h_heading else f"Section {i+1}"
+            if h_heading:
+                h_heading.decompose()
+            sec_content = container.get_text(separator="\n", strip=True)
+            sections.append({"title": sec_title, "content": sec_content})
+        return sections
+
+    headings = article.find_all(HEADING_TAGS)
+    if not headings:
+        return [{"title": "Untitled Section", "content": article.get_text(separator="\n").strip()}]
+    for i, heading in enumerate(headings):
+        sec_title = heading.get_text(strip=True)
+        content_parts = []
+        for sibling in heading.find_next_siblings():
+            if sibling.name in HEADING_TAGS:
+                break
+            text = sibling.get_text(separator=" ", strip=True)
+            if text:
+                content_parts.append(text)
+        sections.append({"title": sec_title or f"Section {i+1}", "content": "\n".join(content_parts).strip()})
+    return sections
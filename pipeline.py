@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import inspect
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latencies = []
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth):
+        self.depth_total += depth
+        self.depth_samples += 1
+        self.depth_max = max(self.depth_max, depth)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        avg = sum(latencies) / len(latencies) if latencies else 0.0
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        peak = latencies[-1] if latencies else 0.0
+        depth_avg = self.depth_total / self.depth_samples if self.depth_samples else 0.0
+        return (f"{self.name:10} workers={self.workers:<3} items={self.processed:<5} dropped={self.dropped:<4} "
+                f"errors={self.errors:<3} latency avg={avg:6.2f}s p95={p95:6.2f}s max={peak:6.2f}s "
+                f"queue avg={depth_avg:5.1f} max={self.depth_max}")
+
+class Stage:
+    def __init__(self, name, fn, workers, blocking):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.blocking = blocking
+        self.stats = StageStats(name, self.workers)
+
+    async def call(self, item):
+        if self.blocking:
+            return await asyncio.to_thread(self.fn, item)
+        result = self.fn(item)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+class Pipeline:
+    """
+    Run items through a chain of stages connected by bounded queues. Each stage has its
+    own worker count, so slow stages (LLM calls) overlap with fast ones, and the bounded
+    queues keep only a handful of items in memory between stages at any time.
+
+    A stage function takes one item and returns the item for the next stage, or None to
+    drop it. Blocking functions (Selenium, HTML parsing, HTTP uploads) run in threads.
+    """
+    def __init__(self, name, queue_size=PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.queue_size = queue_size
+        self.stages = []
+        self.elapsed = 0.0
+
+    def add_stage(self, name, fn, workers=1, blocking=False):
+        self.stages.append(Stage(name, fn, workers, blocking))
+        return self
+
+    async def _worker(self, stage, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            stage.stats.sample_depth(inbox.qsize())
+            start = time.perf_counter()
+            try:
+                result = await stage.call(item)
+            except Exception as e:
+                stage.stats.errors += 1
+                print(f"[{self.name}/{stage.name}] failed: {e}")
+                result = None
+            stage.stats.latencies.append(time.perf_counter() - start)
+            stage.stats.processed += 1
+            if result is None:
+                stage.stats.dropped += 1
+            elif outbox is not None:
+                await outbox.put(result)
+            inbox.task_done()
+
+    async def run(self, items):
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        workers = []
+        for i, stage in enumerate(self.stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            workers.append([asyncio.create_task(self._worker(stage, queues[i], outbox)) for _ in range(stage.workers)])
+
+        start = time.perf_counter()
+        try:
+            for item in items:
+                await queues[0].put(item)
+            # Drain stage by stage: once a stage's inbox is empty and settled, nothing more can reach the next one.
+            for queue, stage_workers in zip(queues, workers):
+                await queue.join()
+                for task in stage_workers:
+                    task.cancel()
+        finally:
+            for stage_workers in workers:
+                for task in stage_workers:
+                    task.cancel()
+            await asyncio.gather(*(task for stage_workers in workers for task in stage_workers), return_exceptions=True)
+        self.elapsed = time.perf_counter() - start
+
+    def print_stats(self):
+        print(f"Pipeline '{self.name}' finished in {self.elapsed:.1f}s")
+        for stage in self.stages:
+            print("  " + stage.stats.summary())
@@ -1,7 +1,10 @@
 import os
 import traceback
+import time
+import asyncio
 import logging
 from datetime import datetime
+import aiohttp
 from aiohttp import web
 from botbuilder.core import TurnContext
 from botbuilder.integration.aiohttp import CloudAdapter, ConfigurationBotFrameworkAuthentication
@@ -9,18 +12,26 @@ from botbuilder.core.integration import aiohttp_error_middleware
 from botbuilder.schema import Activity, ActivityTypes
 from bot import MyBot
 from config import DefaultConfig
-from azure.identity import ManagedIdentityCredential
+from search_client import AsyncSearchClient
+from query_engine import QueryEngine
+from answer_cache import AnswerCache
+from llm_client import AsyncChatClient
+from admission import AdmissionController, DROPPED_ACTIVITIES
+from turn_jobs import TurnJobQueue, BOT_ASYNC_TURNS
+from metrics import metrics_middleware, metrics_handler, STAGE_LATENCY, ERRORS
+from server_logging import configure_logging, redact, sampled, activity_fields, BOT_DIAGNOSTICS, LOG_ACCESS
+from token_provider import TokenProvider, managed_identity_credential, SEARCH_SCOPE, COGNITIVE_SERVICES_SCOPE, BOT_FRAMEWORK_SCOPE
 from http import HTTPStatus
 from aiohttp.web import Response, json_response
 import jwt  # For debugging only
 
-# Logging setup
-logging.basicConfig(level=logging.INFO)
+# Logging setup (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE; see server_logging.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 CONFIG = DefaultConfig()
 
-# 🔍 Patch token validation to debug Invalid AppId errors
+# 🔍 Patch token validation to debug Invalid AppId errors (BOT_DIAGNOSTICS=true only; it decodes and logs every token)
 original_authenticate_request = ConfigurationBotFrameworkAuthentication.authenticate_request
 
 async def debug_authenticate_request(self, activity, auth_header):
@@ -44,7 +55,9 @@ async def debug_authenticate_request(self, activity, auth_header):
 
     return await original_authenticate_request(self, activity, auth_header)
 
-ConfigurationBotFrameworkAuthentication.authenticate_request = debug_authenticate_request
+if BOT_DIAGNOSTICS:
+    logger.warning("Diagnostics mode is on: request headers, bodies and token claims are logged for every turn")
+    ConfigurationBotFrameworkAuthentication.authenticate_request = debug_authenticate_request
 
 # 🔧 Create adapter
 auth_config = ConfigurationBotFrameworkAuthentication(CONFIG)
@@ -53,6 +66,7 @@ logger.info("Created CloudAdapter with authentication configuration")
 
 # 🔄 Catch-all for unhandled errors
 async def on_error(context: TurnContext, error: Exception):
+    ERRORS.inc(kind="turn")
     logger.error(f"[on_turn_error] unhandled error: {error}", exc_info=True)
     await context.send_activity("The bot encountered an error.")
     await context.send_activity("Please fix the bot source code.")
@@ -71,54 +85,254 @@ ADAPTER.on_turn_error = on_error
 # 🤖 Create bot instance
 BOT = MyBot()
 
+# 🚦 Lifecycle: ready once this worker's clients are warm; draining from SIGTERM until in-flight turns finish
+STATE = {"ready": False, "draining": False, "turns": 0}
+DRAIN_SECONDS = float(os.environ.get("DRAIN_SECONDS", "25"))
+STARTUP_RETRY_SECONDS = float(os.environ.get("STARTUP_RETRY_SECONDS", "10"))
+
+# 🔑 Token providers shared by the whole process, keyed by what they are for
+TOKENS = {}
+
+# 🔌 Shared clients: one pooled HTTP session for search and chat completions, opened when the app starts
+async def bot_clients(app):
+    if CONFIG.SEARCH_AUTH_MODE == "key" and not CONFIG.SEARCH_API_KEY:
+        raise ValueError("SEARCH_API_KEY (a query key) is required with SEARCH_AUTH_MODE=key; "
+                         "or set SEARCH_AUTH_MODE=managed_identity")
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONFIG.HTTP_POOL_SIZE))
+    # One credential and one cached token per scope for the whole process, warmed before the first turn.
+    use_identity = {CONFIG.SEARCH_AUTH_MODE, CONFIG.OPENAI_AUTH_MODE} & {"managed_identity"}
+    credential = managed_identity_credential(CONFIG.MicrosoftAppClientId) if use_identity or BOT_DIAGNOSTICS else None
+    search_tokens = TokenProvider(credential, SEARCH_SCOPE) if CONFIG.SEARCH_AUTH_MODE == "managed_identity" else None
+    llm_tokens = TokenProvider(credential, COGNITIVE_SERVICES_SCOPE) if CONFIG.OPENAI_AUTH_MODE == "managed_identity" else None
+    TOKENS["bot_framework"] = TokenProvider(credential, BOT_FRAMEWORK_SCOPE) if BOT_DIAGNOSTICS else None
+    providers = [p for p in (search_tokens, llm_tokens) if p is not None]
+    for provider, result in zip(providers, await asyncio.gather(*(p.get_token() for p in providers), return_exceptions=True)):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not warm the token for {provider.scope}; the first turn will retry")
+
+    search_client = AsyncSearchClient(CONFIG.SEARCH_SERVICE_NAME, CONFIG.SEARCH_API_KEY,
+                                      timeout=CONFIG.SEARCH_TIMEOUT_SECONDS, session=session, token_provider=search_tokens)
+    BOT.query_engine = QueryEngine(search_client, CONFIG.SEARCH_INDEXES, deadline=CONFIG.SEARCH_TIMEOUT_SECONDS, top_k=CONFIG.SEARCH_TOP)
+    BOT.llm_client = AsyncChatClient(max_retries=2, timeout=CONFIG.ANSWER_TIMEOUT_SECONDS, session=session, token_provider=llm_tokens)
+    if CONFIG.ANSWER_CACHE_ENABLED:
+        BOT.answer_cache = AnswerCache()
+    if JOBS is not None:
+        JOBS.start()
+    # The worker serves requests straight away but only reports ready once search has answered.
+    search_ready = asyncio.create_task(prepare_search(search_client))
+    yield
+    STATE["ready"] = False
+    if JOBS is not None:
+        await JOBS.stop()
+    search_ready.cancel()
+    if BOT.answer_cache is not None:
+        logger.info(BOT.answer_cache.stats())
+    BOT.query_engine = BOT.llm_client = BOT.answer_cache = None
+    await session.close()
+    if credential is not None:
+        await credential.close()
+
+async def prepare_search(search_client):
+    """
+    Resolve the indexes and take the answer cache's first fingerprint of them, retrying every
+    STARTUP_RETRY_SECONDS while the search service is unreachable or refuses the credential.
+    Marks the worker ready once both worked, then watches the indexes for the answer cache.
+    """
+    while True:
+        try:
+            indexes = await BOT.query_engine.resolve_indexes()
+            if BOT.answer_cache is not None:
+                BOT.answer_cache.invalidate(await search_client.index_fingerprint(indexes))
+            break
+        except Exception as e:
+            logger.warning(f"Search is not ready ({e!r}); retrying in {STARTUP_RETRY_SECONDS}s")
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
+    logger.info(f"Search client ready for {search_client.endpoint} (indexes: {', '.join(indexes)})")
+    STATE["ready"] = True
+    if BOT.answer_cache is not None:
+        await BOT.answer_cache.watch_indexes(search_client, indexes)
+
+async def drain_turns(app):
+    # Runs on shutdown (SIGTERM from gunicorn or App Service) after the listener has closed, before the clients close.
+    STATE["draining"] = True
+    deadline = time.monotonic() + DRAIN_SECONDS
+    if in_flight():
+        logger.info(f"Draining {in_flight()} in-flight turn(s)")
+    while in_flight() and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    if in_flight():
+        logger.warning(f"Shutting down with {in_flight()} turn(s) still in flight")
+
+def in_flight():
+    # Turns still holding a request open, plus acknowledged turns whose answer has not been sent yet.
+    return STATE["turns"] + (JOBS.pending if JOBS is not None else 0)
+
+# ❤️ Liveness: the process is up and serving requests
+async def healthz(req):
+    return json_response({"status": "ok"})
+
+# 🟢 Readiness: clients are warm and the worker is not draining
+async def readyz(req):
+    if STATE["ready"] and not STATE["draining"]:
+        return json_response({"status": "ready", "turns": in_flight()})
+    return json_response({"status": "draining" if STATE["draining"] else "starting"}, status=HTTPStatus.SERVICE_UNAVAILABLE)
+
 # ✅ Debug token endpoint
 async def debug_token(req):
     try:
-        credential = ManagedIdentityCredential(client_id=os.environ["AZURE_CLIENT_ID"])
-        token = credential.get_token("https://api.botframework.com/.default")
-        return Response(text=f"✅ Got token:\n{token.token[:50]}...", status=200)
+        token = await TOKENS["bot_framework"].get_token()
+        return Response(text=f"✅ Got token:\n{token[:50]}...", status=200)
     except Exception as e:
         return Response(text=f"❌ Failed to get token: {str(e)}", status=500)
 
+async def timed_on_turn(turn_context: TurnContext):
+    with STAGE_LATENCY.time(stage="on_turn"):
+        await BOT.on_turn(turn_context)
+
+# 🚧 Admission control: a per-worker cap on concurrent turns (see admission.py)
+ADMISSION = AdmissionController()
+BUSY_MESSAGE = "I'm handling a lot of questions right now. Please try again in a few seconds."
+
+async def busy_turn(turn_context: TurnContext):
+    if turn_context.activity.type == ActivityTypes.message:
+        await turn_context.send_activity(BUSY_MESSAGE)
+        return
+    # Nobody to tell for a conversationUpdate, typing etc., but it should not vanish without a trace.
+    DROPPED_ACTIVITIES.inc(type=turn_context.activity.type or "unknown")
+    logger.warning("Dropped activity at capacity", extra={"fields": activity_fields(turn_context.activity)})
+
+# 📨 Async job mode (BOT_ASYNC_TURNS=true): messages are acknowledged at once and answered proactively by a worker pool
+JOBS = TurnJobQueue(per_conversation=ADMISSION.per_conversation_queue) if BOT_ASYNC_TURNS else None
+
+async def enqueue_turn(auth_result, activity: Activity) -> bool:
+    """
+    Queue the answer to a message activity and return False if the queue is full or the
+    conversation already has its share of answers pending. The worker continues the
+    conversation through its stored reference, with the identity the request was
+    authenticated with, so the reply goes back to the same conversation and service URL.
+    """
+    reference = TurnContext.get_conversation_reference(activity)
+    question = (activity.text or "").strip()
+
+    async def proactive_turn(turn_context: TurnContext):
+        with STAGE_LATENCY.time(stage="on_turn"):
+            await BOT.reply(turn_context, question)
+
+    async def job():
+        await ADAPTER.continue_conversation(reference, proactive_turn, bot_app_id=CONFIG.MicrosoftAppId,
+                                            claims_identity=auth_result.claims_identity, audience=auth_result.audience)
+
+    conversation_id = activity.conversation.id if activity.conversation else ""
+    return JOBS.submit(job, name=activity.id or "", conversation_id=conversation_id)
+
 # 📥 Incoming messages
 async def messages(req: web.Request) -> web.Response:
-    logger.info("Received request at /api/messages")
-    logger.info(f"Request headers: {req.headers}")
+    start = time.perf_counter()
+    if BOT_DIAGNOSTICS:
+        logger.info("Received request at /api/messages", extra={"fields": {"headers": redact(dict(req.headers))}})
+
+    if STATE["draining"]:
+        # The channel retries; by then another worker or instance picks the activity up.
+        return Response(status=HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
 
     if "application/json" not in req.headers.get("Content-Type", ""):
         logger.warning("Unsupported media type")
         return Response(status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
 
     try:
-        body = await req.json()
-        logger.info(f"Request body: {body}")
-        activity = Activity().deserialize(body)
+        with STAGE_LATENCY.time(stage="deserialize"):
+            body = await req.json()
+            activity = Activity().deserialize(body)
+        if BOT_DIAGNOSTICS:
+            logger.info("Request body", extra={"fields": {"body": redact(body)}})
     except Exception as e:
         logger.error(f"Failed to deserialize activity: {e}", exc_info=True)
         return Response(status=HTTPStatus.BAD_REQUEST)
 
-    auth_header = req.headers.get("Authorization", "")
-    logger.info(f"Authorization header: {auth_header[:80]}...")
+    # Authenticate before admission, so unauthenticated requests can never hold or wait for a turn slot.
+    # Doing it here rather than inside process_activity also lets auth be timed on its own.
+    try:
+        with STAGE_LATENCY.time(stage="auth"):
+            auth_result = await auth_config.authenticate_request(activity, req.headers.get("Authorization", ""))
+    except Exception as e:
+        logger.warning(f"Rejected unauthenticated activity: {e}", extra={"fields": activity_fields(activity)})
+        return Response(status=HTTPStatus.UNAUTHORIZED)
+
+    if JOBS is not None and activity.type == ActivityTypes.message and (activity.text or "").strip():
+        return await acknowledge_message(auth_result, activity, start)
 
+    # Over capacity the turn still runs, but only to send the short busy reply.
+    conversation_id = activity.conversation.id if activity.conversation else ""
+    admitted = await ADMISSION.acquire(conversation_id)
+    turn = timed_on_turn if admitted else busy_turn
+
+    status = HTTPStatus.INTERNAL_SERVER_ERROR
+    STATE["turns"] += 1
     try:
-        response = await ADAPTER.process_activity(auth_header, activity, BOT.on_turn)
+        response = await ADAPTER.process_activity(auth_result, activity, turn)
         if response:
+            status = response.status
             return json_response(data=response.body, status=response.status)
+        status = HTTPStatus.OK
+        return Response(status=HTTPStatus.OK)
+    except Exception as e:
+        logger.error(f"Error processing activity: {e}", exc_info=True, extra={"fields": activity_fields(activity)})
+        return Response(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    finally:
+        STATE["turns"] -= 1
+        if admitted:
+            ADMISSION.release()
+        # One summary line for a sample of turns instead of headers and bodies for all of them.
+        if BOT_DIAGNOSTICS or sampled():
+            fields = dict(activity_fields(activity), status=int(status), admitted=admitted,
+                          ms=round((time.perf_counter() - start) * 1000))
+            logger.info("Handled /api/messages", extra={"fields": fields})
+
+async def acknowledge_message(auth_result, activity: Activity, start) -> web.Response:
+    # The webhook only queues the authenticated turn; the answer follows as a proactive message.
+    status = HTTPStatus.INTERNAL_SERVER_ERROR
+    queued = False
+    try:
+        queued = await enqueue_turn(auth_result, activity)
+        if not queued:
+            # Not queued: the turn runs inline, but only to send the short busy reply.
+            await ADAPTER.process_activity(auth_result, activity, busy_turn)
+        status = HTTPStatus.OK
         return Response(status=HTTPStatus.OK)
     except Exception as e:
-        logger.error(f"Error processing activity: {e}", exc_info=True)
+        logger.error(f"Error queueing activity: {e}", exc_info=True, extra={"fields": activity_fields(activity)})
         return Response(status=HTTPStatus.INTERNAL_SERVER_ERROR)
+    finally:
+        if BOT_DIAGNOSTICS or sampled():
+            fields = dict(activity_fields(activity), status=int(status), queued=queued,
+                          ms=round((time.perf_counter() - start) * 1000))
+            logger.info("Acknowledged /api/messages", extra={"fields": fields})
 
 # 🌐 App init
-APP = web.Application(middlewares=[aiohttp_error_middleware])
-APP.router.add_post("/api/messages", messages)
-APP.router.add_get("/debug-token", debug_token)
+def create_app():
+    """
+    Build the aiohttp application. gunicorn calls this once per worker (see gunicorn.conf.py),
+    so every worker warms its own HTTP session, search client and token cache.
+    """
+    app = web.Application(middlewares=[metrics_middleware, aiohttp_error_middleware])
+    app.router.add_post("/api/messages", messages)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    if BOT_DIAGNOSTICS:
+        app.router.add_get("/debug-token", debug_token)
+    app.cleanup_ctx.append(bot_clients)
+    app.on_shutdown.append(drain_turns)
+    logger.info("App is ready!")
+    return app
 
-logger.info("App is ready!")
+# Module-level app for "gunicorn query_agent:APP" and other loaders that expect an object, not a factory.
+APP = create_app()
 
 if __name__ == "__main__":
     try:
-        web.run_app(APP, host="0.0.0.0", port=3978)
+        web.run_app(APP, host="0.0.0.0", port=3978, shutdown_timeout=DRAIN_SECONDS,
+                    access_log=logging.getLogger("aiohttp.access") if LOG_ACCESS else None)
     except Exception as error:
         logger.error("Failed to start web application", exc_info=True)
         raise error
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+
+from dotenv import load_dotenv
+
+from search_client import SearchError, SEARCH_TIMEOUT_SECONDS, SEARCH_TOP
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Each index is asked for a few more hits than the final answer needs so fusion has something to rank.
+SEARCH_PER_INDEX_TOP = int(os.environ.get("SEARCH_PER_INDEX_TOP", "10"))
+# The usual reciprocal-rank fusion constant; larger values flatten the gap between ranks.
+RRF_K = int(os.environ.get("RRF_K", "60"))
+# Hits whose words are mostly contained in a better-ranked hit are treated as the same chunk.
+DUPLICATE_OVERLAP = float(os.environ.get("DUPLICATE_OVERLAP", "0.8"))
+
+WORD = re.compile(r"\w+")
+
+def _words(text):
+    return WORD.findall((text or "").lower())
+
+def content_key(doc):
+    return hashlib.sha1(" ".join(_words(doc.get("content"))).encode("utf-8")).hexdigest()
+
+def _shingles(doc, size=3):
+    words = _words(doc.get("content"))
+    return {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+class QueryResult:
+    def __init__(self, query):
+        self.query = query
+        self.documents = []
+        self.searched = []
+        self.timed_out = []
+        self.failed = []
+        self.elapsed = 0.0
+
+    def __str__(self):
+        summary = f"{len(self.documents)} hit(s) from {len(self.searched)} index(es) in {self.elapsed * 1000:.0f} ms"
+        if self.timed_out:
+            summary += f", timed out: {', '.join(self.timed_out)}"
+        if self.failed:
+            summary += f", failed: {', '.join(self.failed)}"
+        return summary
+
+class QueryEngine:
+    """
+    Send one query to several indexes at once and merge the answers. Each index gets its
+    own deadline and is simply left out when it misses it. Ranked lists are combined with
+    reciprocal-rank fusion, since raw scores from different indexes are not comparable,
+    and duplicate or overlapping chunks are folded into the best-ranked copy.
+    """
+    def __init__(self, search_client, indexes, deadline=SEARCH_TIMEOUT_SECONDS, top_k=SEARCH_TOP,
+                 per_index_top=SEARCH_PER_INDEX_TOP, rrf_k=RRF_K, duplicate_overlap=DUPLICATE_OVERLAP):
+        self.search_client = search_client
+        self.indexes = list(indexes)
+        self.deadline = deadline
+        self.top_k = top_k
+        self.per_index_top = per_index_top
+        self.rrf_k = rrf_k
+        self.duplicate_overlap = duplicate_overlap
+
+    async def resolve_indexes(self):
+        # "*" stands for every index on the service, e.g. the per-URL indexes create_index.py builds.
+        if "*" in self.indexes:
+            self.indexes = await self.search_client.list_indexes()
+        return self.indexes
+
+    async def query(self, text, indexes=None, top_k=None):
+        result = QueryResult(text)
+        result.searched = list(indexes or self.indexes)
+        start = time.perf_counter()
+        ranked_lists = await asyncio.gather(*(self._search_index(index_name, text, result) for index_name in result.searched))
+        result.documents = self.fuse(ranked_lists, top_k or self.top_k)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def _search_index(self, index_name, text, result):
+        try:
+            docs = await asyncio.wait_for(
+                self.search_client.search(index_name, text, top=self.per_index_top, timeout=self.deadline),
+                self.deadline
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Search on {index_name} missed its {self.deadline}s deadline; leaving it out")
+            result.timed_out.append(index_name)
+            return []
+        except SearchError as e:
+            logger.error(f"Search query failed: {e}")
+            result.failed.append(index_name)
+            return []
+        for doc in docs:
+            doc["@search.index"] = index_name
+        return docs
+
+    def fuse(self, ranked_lists, top_k):
+        fused = {}
+        for docs in ranked_lists:
+            for rank, doc in enumerate(docs, start=1):
+                key = content_key(doc)
+                score = 1.0 / (self.rrf_k + rank)
+                if key in fused:
+                    # The same chunk found in several indexes (a per-URL index and the unified one) adds up.
+                    fused[key]["@fusion.score"] += score
+                else:
+                    fused[key] = dict(doc, **{"@fusion.score": score})
+        ranked = sorted(fused.values(), key=lambda doc: doc["@fusion.score"], reverse=True)
+
+        kept, kept_shingles = [], []
+        for doc in ranked:
+            shingles = _shingles(doc)
+            if any(len(shingles & other) >= self.duplicate_overlap * len(shingles) for other in kept_shingles):
+                continue
+            kept.append(doc)
+            kept_shingles.append(shingles)
+            if len(kept) >= top_k:
+                break
+        return kept
@@ -0,0 +1,145 @@
+import os
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCRAPER_WORKERS = int(os.environ.get("SCRAPER_WORKERS", "4"))
+SCRAPER_HEADLESS = os.environ.get("SCRAPER_HEADLESS", "true").lower() != "false"
+# Optional Edge profile directory so the signed-in session survives between runs.
+EDGE_PROFILE_DIR = os.environ.get("EDGE_PROFILE_DIR")
+CONTENT_WAIT_SECONDS = 20
+
+def resolve_edge_driver():
+    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+    return EdgeChromiumDriverManager().install()
+
+class EdgeFetcher:
+    """
+    A long-lived Edge browser. Cookies picked up on the first authenticated page
+    are reused for every later URL fetched through the same instance.
+    """
+    def __init__(self, driver_path, headless=True, profile_dir=None, wait_seconds=CONTENT_WAIT_SECONDS):
+        from selenium import webdriver
+        from selenium.webdriver.edge.service import Service as EdgeService
+        options = webdriver.EdgeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        if profile_dir:
+            options.add_argument(f"--user-data-dir={profile_dir}")
+        self.driver = webdriver.Edge(options=options, service=EdgeService(driver_path))
+        self.wait_seconds = wait_seconds
+
+    def fetch(self, url):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        self.driver.get(url)
+        try:
+            WebDriverWait(self.driver, self.wait_seconds).until(lambda d: d.find_element(By.ID, "_content"))
+        except Exception as e:
+            print(f"Warning: Main content not detected for {url}; proceeding anyway.", e)
+        return self.driver.page_source
+
+    def close(self):
+        self.driver.quit()
+
+class HttpFetcher:
+    """
+    Plain HTTP fetcher sharing one connection pool. Useful for public pages and
+    for running the pool against a local static server.
+    """
+    def __init__(self, timeout=30):
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def fetch(self, url):
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+def edge_fetcher_factory(headless=SCRAPER_HEADLESS, profile_dir=EDGE_PROFILE_DIR):
+    """
+    Resolve the Edge driver once and return a factory that starts browsers with it.
+    Each browser gets its own profile sub-directory since Edge locks the profile in use.
+    """
+    driver_path = resolve_edge_driver()
+    worker_ids = itertools.count()
+
+    def factory():
+        worker_profile = os.path.join(profile_dir, f"worker-{next(worker_ids)}") if profile_dir else None
+        return EdgeFetcher(driver_path, headless=headless, profile_dir=worker_profile)
+    return factory
+
+class ScraperPool:
+    """
+    Scrape URLs concurrently over at most `workers` fetchers. Fetchers are created
+    lazily, handed out to one thread at a time and kept alive until close().
+    """
+    def __init__(self, workers=SCRAPER_WORKERS, fetcher_factory=None):
+        self.workers = max(1, workers)
+        self.fetcher_factory = fetcher_factory or edge_fetcher_factory()
+        self._idle = queue.Queue()
+        self._fetchers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            fetcher = self.fetcher_factory()
+            with self._lock:
+                self._fetchers.append(fetcher)
+            return fetcher
+
+    def _discard(self, fetcher):
+        # A fetcher that failed may have a dead browser behind it; the next _acquire starts a fresh one.
+        with self._lock:
+            if fetcher in self._fetchers:
+                self._fetchers.remove(fetcher)
+        try:
+            fetcher.close()
+        except Exception as e:
+            print("Failed to close fetcher:", e)
+
+    def scrape(self, url):
+        fetcher = None
+        try:
+            fetcher = self._acquire()
+            html = fetcher.fetch(url)
+        except Exception as e:
+            print(f"Failed to scrape {url}: {e}")
+            if fetcher is not None:
+                self._discard(fetcher)
+            return ""
+        self._idle.put(fetcher)
+        return html
+
+    def scrape_all(self, urls):
+        """
+        Yield (url, html) pairs in input order while later URLs are still being fetched.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            yield from zip(urls, executor.map(self.scrape, urls))
+
+    def close(self):
+        with self._lock:
+            fetchers, self._fetchers = self._fetchers, []
+        for fetcher in fetchers:
+            try:
+                fetcher.close()
+            except Exception as e:
+                print("Failed to close fetcher:", e)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,123 @@
+import os
+import asyncio
+
+import aiohttp
+from dotenv import load_dotenv
+
+from search_upload import API_VERSION, search_endpoint
+
+load_dotenv()
+
+SEARCH_TIMEOUT_SECONDS = float(os.environ.get("SEARCH_TIMEOUT_SECONDS", "3"))
+SEARCH_TOP = int(os.environ.get("SEARCH_TOP", "5"))
+
+class SearchError(Exception):
+    pass
+
+async def read_json(response, what):
+    # A 200 from a proxy or gateway can still carry an HTML error page instead of the service's JSON.
+    try:
+        result = await response.json(content_type=None)
+    except ValueError as e:
+        raise SearchError(f"{what} returned a body that is not JSON: {e}") from e
+    if not isinstance(result, dict):
+        raise SearchError(f"{what} returned an unexpected body: {result!r}")
+    return result
+
+class AsyncSearchClient:
+    """
+    Query client for the search REST API that runs on the event loop. It is created once
+    at startup and reuses one pooled aiohttp session across every conversation.
+    """
+    def __init__(self, service_name, api_key, endpoint=None, timeout=SEARCH_TIMEOUT_SECONDS, session=None, token_provider=None):
+        self.endpoint = endpoint or search_endpoint(service_name)
+        self.api_key = api_key
+        # With a token provider (managed identity) requests carry a bearer token instead of the api-key.
+        self.token_provider = token_provider
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    async def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.token_provider is not None:
+            headers["Authorization"] = await self.token_provider.authorization_header()
+        elif self.api_key:
+            headers["api-key"] = self.api_key
+        return headers
+
+    async def list_indexes(self):
+        url = f"{self.endpoint}/indexes?api-version={API_VERSION}&$select=name"
+        try:
+            async with self.session.get(url, headers=await self._headers(), timeout=self.timeout) as response:
+                if response.status != 200:
+                    raise SearchError(f"Listing indexes returned HTTP {response.status}: {await response.text()}")
+                result = await read_json(response, "Listing indexes")
+        except aiohttp.ClientError as e:
+            raise SearchError(f"Listing indexes failed: {e}") from e
+        return [index["name"] for index in result.get("value", [])]
+
+    async def index_fingerprint(self, index_names):
+        """
+        Return {index name: [document count, newest upload_date]}, or None for a missing index.
+        Both come from one search request per index, which a query key may make (index
+        definitions and statistics need an admin key). Every run of create_index.py stamps the
+        documents it writes, so a rebuild or an update moves the newest upload_date and a
+        deletion changes the count. Raises SearchError on any other HTTP error.
+        """
+        body = {"search": "*", "count": True, "top": 1, "orderby": "upload_date desc", "select": "upload_date"}
+
+        async def fingerprint(index_name):
+            url = f"{self.endpoint}/indexes/{index_name}/docs/search?api-version={API_VERSION}"
+            async with self.session.post(url, headers=await self._headers(), json=body, timeout=self.timeout) as response:
+                if response.status == 404:
+                    return None
+                if response.status != 200:
+                    raise SearchError(f"Counting documents in {index_name} returned HTTP {response.status}: {await response.text()}")
+                result = await read_json(response, f"Counting documents in {index_name}")
+            newest = result.get("value") or [{}]
+            return [result.get("@odata.count"), newest[0].get("upload_date")]
+        try:
+            values = await asyncio.gather(*(fingerprint(index_name) for index_name in index_names))
+        except aiohttp.ClientError as e:
+            raise SearchError(f"Reading index fingerprints failed: {e}") from e
+        return dict(zip(index_names, values))
+
+    async def search(self, index_name, query, top=SEARCH_TOP, select=None, filter=None, timeout=None):
+        """
+        Return the matching documents (dicts with "@search.score") for one index. Raises
+        SearchError on an HTTP error or a body that is not the service's JSON, and
+        asyncio.TimeoutError once the timeout runs out.
+        """
+        body = {"search": query, "top": top}
+        if select:
+            body["select"] = ",".join(select)
+        if filter:
+            body["filter"] = filter
+        url = f"{self.endpoint}/indexes/{index_name}/docs/search?api-version={API_VERSION}"
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else self.timeout
+        try:
+            async with self.session.post(url, headers=await self._headers(), json=body, timeout=request_timeout) as response:
+                if response.status != 200:
+                    raise SearchError(f"Search on {index_name} returned HTTP {response.status}: {await response.text()}")
+                result = await read_json(response, f"Search on {index_name}")
+        except aiohttp.ClientError as e:
+            raise SearchError(f"Search on {index_name} failed: {e}") from e
+        return result.get("value", [])
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_VERSION = "2021-04-30-Preview"
+# The service rejects batches over 1000 documents or 16 MB; stay well below the byte limit.
+UPLOAD_BATCH_DOCS = int(os.environ.get("UPLOAD_BATCH_DOCS", "1000"))
+UPLOAD_BATCH_BYTES = int(os.environ.get("UPLOAD_BATCH_BYTES", str(4 * 1024 * 1024)))
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "4"))
+# Per-document status codes the service documents as transient.
+RETRYABLE_DOC_STATUSES = {409, 422, 503}
+RETRYABLE_BATCH_STATUSES = {429, 503}
+
+def search_endpoint(service_name):
+    # SEARCH_ENDPOINT lets the uploader and the bot talk to a local fake of the service.
+    return os.environ.get("SEARCH_ENDPOINT") or f"https://{service_name}.search.windows.net"
+
+def batch_documents(documents, max_docs=UPLOAD_BATCH_DOCS, max_bytes=UPLOAD_BATCH_BYTES):
+    batch, batch_bytes = [], 0
+    for doc in documents:
+        size = len(json.dumps(doc).encode("utf-8"))
+        if batch and (len(batch) >= max_docs or batch_bytes + size > max_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(doc)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+class UploadReport:
+    def __init__(self, index_name, action):
+        self.index_name = index_name
+        self.action = action
+        self.succeeded = 0
+        self.failed = []
+        self.elapsed = 0.0
+
+    @property
+    def docs_per_second(self):
+        return self.succeeded / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        summary = (f"{self.action}: {self.succeeded} document(s) into {self.index_name} in {self.elapsed:.2f}s "
+                   f"({self.docs_per_second:.0f} docs/s)")
+        if self.failed:
+            summary += f", {len(self.failed)} failed"
+        return summary
+
+class BulkUploader:
+    """
+    Send documents to an index in batches bounded by count and payload bytes, several
+    batches at a time over one pooled session. Only the keys the service reports as
+    failed with a transient status are retried.
+    """
+    def __init__(self, service_name, admin_key, endpoint=None, max_docs=UPLOAD_BATCH_DOCS,
+                 max_bytes=UPLOAD_BATCH_BYTES, workers=UPLOAD_WORKERS, max_retries=3, timeout=60):
+        self.endpoint = endpoint or search_endpoint(service_name)
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", "api-key": admin_key or ""})
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.workers))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=self.workers))
+
+    def upload(self, index_name, documents):
+        return self.index_documents(index_name, documents, "upload")
+
+    def merge_or_upload(self, index_name, documents):
+        return self.index_documents(index_name, documents, "mergeOrUpload")
+
+    def delete(self, index_name, keys, key_field="id"):
+        return self.index_documents(index_name, [{key_field: key} for key in keys], "delete")
+
+    def index_documents(self, index_name, documents, action="upload", key_field="id"):
+        report = UploadReport(index_name, action)
+        start = time.perf_counter()
+        actions = [{"@search.action": action, **doc} for doc in documents]
+        batches = list(batch_documents(actions, self.max_docs, self.max_bytes))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for succeeded, failed in executor.map(lambda b: self._send_batch(index_name, b, key_field), batches):
+                report.succeeded += succeeded
+                report.failed.extend(failed)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _send_batch(self, index_name, batch, key_field):
+        url = f"{self.endpoint}/indexes/{index_name}/docs/index?api-version={API_VERSION}"
+        pending = {doc[key_field]: doc for doc in batch}
+        succeeded = 0
+        final_failures = []
+        transient = {}
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(30, 2 ** attempt)))
+            try:
+                response = self.session.post(url, json={"value": list(pending.values())}, timeout=self.timeout)
+            except requests.RequestException as e:
+                transient = {key: str(e) for key in pending}
+                continue
+            if response.status_code == 413 and len(pending) > 1:
+                # Still too large for the service: split the batch and send the halves on their own.
+                docs = list(pending.values())
+                middle = len(docs) // 2
+                halves = [self._send_batch(index_name, half, key_field) for half in (docs[:middle], docs[middle:])]
+                return succeeded + sum(h[0] for h in halves), final_failures + [f for h in halves for f in h[1]]
+            if response.status_code in RETRYABLE_BATCH_STATUSES:
+                transient = {key: f"HTTP {response.status_code}" for key in pending}
+                continue
+            if response.status_code not in (200, 207):
+                return succeeded, final_failures + [(key, f"HTTP {response.status_code}: {response.text}") for key in pending]
+
+            transient = {}
+            for result in response.json().get("value", []):
+                key = result.get("key")
+                message = result.get("errorMessage") or f"HTTP {result.get('statusCode')}"
+                if result.get("status"):
+                    succeeded += 1
+                elif result.get("statusCode") in RETRYABLE_DOC_STATUSES and key in pending:
+                    transient[key] = message
+                else:
+                    final_failures.append((key, message))
+            if not transient:
+                return succeeded, final_failures
+            # Resend only the keys that failed with a transient status.
+            pending = {key: pending[key] for key in transient}
+        return succeeded, final_failures + list(transient.items())
+
+    def close(self):
+        self.session.close()
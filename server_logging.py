@@ -0,0 +1,87 @@
+import os
+import json
+import random
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" writes one object per line for log search; "text" is easier to read locally.
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+# Fraction of /api/messages requests that get a one-line INFO summary; errors are always logged.
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.01"))
+LOG_ACCESS = os.environ.get("LOG_ACCESS", "false").lower() == "true"
+# Diagnostics mode logs redacted headers, bodies and decoded token claims for every request.
+BOT_DIAGNOSTICS = os.environ.get("BOT_DIAGNOSTICS", "false").lower() == "true"
+
+SENSITIVE_KEYS = {"authorization", "api-key", "cookie", "set-cookie", "x-functions-key", "ocp-apim-subscription-key",
+                  "token", "access_token", "password", "secret", "client_secret"}
+REDACTED = "[redacted]"
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(levelname)s:%(name)s:%(message)s")
+
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            message += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return message
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+def redact(value):
+    """
+    Return a copy of a mapping (headers, JSON bodies) with secrets replaced. Authorization
+    keeps its scheme so a missing or malformed header is still visible.
+    """
+    if isinstance(value, dict) or hasattr(value, "items"):
+        redacted = {}
+        for key, item in value.items():
+            if str(key).lower() == "authorization" and isinstance(item, str):
+                redacted[key] = f"{item.split(' ', 1)[0]} {REDACTED}" if " " in item else REDACTED
+            elif str(key).lower() in SENSITIVE_KEYS:
+                redacted[key] = REDACTED
+            else:
+                redacted[key] = redact(item)
+        return redacted
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+def sampled(rate=LOG_SAMPLE_RATE):
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+def activity_fields(activity):
+    """
+    Fields that identify a turn without logging what the user wrote.
+    """
+    return {
+        "activity_type": activity.type,
+        "channel": activity.channel_id,
+        "conversation": activity.conversation.id if activity.conversation else None,
+        "text_chars": len(activity.text or ""),
+    }
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_DECISIONS
+
+def decisions(outcome):
+    return ADMISSION_DECISIONS.values.get((outcome,), 0)
+
+async def take_turn(controller, conversation_id):
+    # Acquire, hold the slot for a moment and release it, like a short turn.
+    admitted = await controller.acquire(conversation_id)
+    if admitted:
+        await asyncio.sleep(0)
+        controller.release()
+    return admitted
+
+def assert_idle(controller):
+    assert controller.active == 0 and controller.queued == 0 and not controller._waiters
+    assert ADMISSION_ACTIVE.values[()] == 0 and ADMISSION_QUEUED.values[()] == 0
+
+def test_slots_go_round_robin_across_conversations():
+    controller = AdmissionController(max_turns=1, queue_size=10, queue_timeout=5, per_conversation_queue=3)
+    order = []
+
+    async def turn(conversation_id, name):
+        if await controller.acquire(conversation_id):
+            order.append(name)
+            await asyncio.sleep(0)
+            controller.release()
+
+    async def main():
+        assert await controller.acquire("holder")
+        waiting = []
+        # A queues three turns before B's first one arrives.
+        for conversation_id, name in [("A", "A0"), ("A", "A1"), ("A", "A2"), ("B", "B0")]:
+            waiting.append(asyncio.create_task(turn(conversation_id, name)))
+            await asyncio.sleep(0)
+        assert controller.queued == 4
+        controller.release()
+        await asyncio.gather(*waiting)
+
+    asyncio.run(main())
+
+    assert order == ["A0", "B0", "A1", "A2"]
+    assert_idle(controller)
+
+def test_full_queue_rejects_at_once():
+    controller = AdmissionController(max_turns=1, queue_size=2, queue_timeout=5)
+    rejected_before = decisions("rejected_full")
+
+    async def main():
+        assert await controller.acquire("holder")
+        waiting = [asyncio.create_task(take_turn(controller, c)) for c in ("A", "B")]
+        await asyncio.sleep(0)
+        rejected = await controller.acquire("C")
+        controller.release()
+        assert await asyncio.gather(*waiting) == [True, True]
+        return rejected
+
+    assert asyncio.run(main()) is False
+    assert decisions("rejected_full") == rejected_before + 1
+    assert_idle(controller)
+
+def test_waiting_longer_than_the_timeout_is_rejected():
+    controller = AdmissionController(max_turns=1, queue_size=10, queue_timeout=0.05)
+    timeouts_before = decisions("rejected_timeout")
+
+    async def main():
+        assert await controller.acquire("holder")
+        admitted = await controller.acquire("A")
+        assert controller.queued == 0
+        controller.release()
+        return admitted
+
+    assert asyncio.run(main()) is False
+    assert decisions("rejected_timeout") == timeouts_before + 1
+    assert_idle(controller)
+
+def test_one_conversation_cannot_fill_the_queue():
+    controller = AdmissionController(max_turns=1, queue_size=10, queue_timeout=5, per_conversation_queue=2)
+
+    async def main():
+        assert await controller.acquire("holder")
+        waiting = [asyncio.create_task(take_turn(controller, c)) for c in ("chatty", "chatty")]
+        await asyncio.sleep(0)
+        third = await controller.acquire("chatty")
+        waiting.append(asyncio.create_task(take_turn(controller, "quiet")))
+        await asyncio.sleep(0)
+        assert controller.queued == 3
+        controller.release()
+        assert await asyncio.gather(*waiting) == [True, True, True]
+        return third
+
+    assert asyncio.run(main()) is False
+    assert_idle(controller)
+
+def test_cancelled_waiter_gives_up_its_place():
+    controller = AdmissionController(max_turns=1, queue_size=10, queue_timeout=5)
+
+    async def main():
+        assert await controller.acquire("holder")
+        waiter = asyncio.create_task(controller.acquire("A"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        controller.release()
+
+    asyncio.run(main())
+    assert_idle(controller)
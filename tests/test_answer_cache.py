@@ -0,0 +1,18 @@
+from answer_cache import AnswerCache
+
+def test_expired_best_match_falls_through_to_next_candidate():
+    cache = AnswerCache(similarity=0.5)
+    cache.put("how do I restart the web app worker", "older answer")
+    cache.put("how do I restart the web app worker process", "best answer")
+    cache.entries["how do i restart the web app worker process"]["expires"] = 0
+
+    assert cache.get("restart web app worker process now") == ("older answer", "similar")
+    assert "how do i restart the web app worker process" not in cache.entries
+
+def test_index_change_drops_cached_answers():
+    cache = AnswerCache()
+    cache.invalidate({"index": [2, "2026-01-01T00:00:00Z"]})
+    cache.put("how do I deploy", "answer")
+    cache.invalidate({"index": [2, "2026-01-02T00:00:00Z"]})
+    assert cache.get("how do I deploy") == (None, None)
+    assert cache.invalidations == 1
@@ -0,0 +1,158 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import bot
+from bot import MyBot, StreamingReply
+from llm_client import AsyncChatClient
+
+FILTER_ONLY_CHUNK = {"choices": [], "prompt_filter_results": [{"prompt_index": 0, "content_filter_results": {}}]}
+
+def delta_chunk(content):
+    return {"choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}]}
+
+async def with_sse_server(deltas, test, delay=0.0, stall=False):
+    """
+    Serve POST / as a chat-completions event stream: the filter-only chunk, then one chunk per
+    delta, delay seconds apart. With stall, the stream never ends after the last delta.
+    """
+    async def handler(request):
+        await request.json()
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(f"data: {json.dumps(FILTER_ONLY_CHUNK)}\n\n".encode("utf-8"))
+        for content in deltas:
+            await asyncio.sleep(delay)
+            await response.write(f"data: {json.dumps(delta_chunk(content))}\n\n".encode("utf-8"))
+        if stall:
+            await asyncio.sleep(3600)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    async with TestServer(app) as server:
+        async with AsyncChatClient(endpoint=str(server.make_url("/")), api_key="key", deployment="gpt") as client:
+            return await test(client)
+
+class FakeTurnContext:
+    """Records sends and edits; without activity ids the channel behaves as if edits were unsupported."""
+    def __init__(self, activity_ids=True):
+        self.activity_ids = activity_ids
+        self.sent = []
+        self.updates = []
+
+    async def send_activity(self, activity):
+        self.sent.append(activity.text)
+        return SimpleNamespace(id=f"activity-{len(self.sent)}") if self.activity_ids else None
+
+    async def update_activity(self, activity):
+        self.updates.append((activity.id, activity.text))
+
+class StubQueryEngine:
+    async def query(self, text):
+        return SimpleNamespace(documents=[{"title": "Deploying", "content": "Run deploy.sh from the release branch."}],
+                               timed_out=[], failed=[])
+
+class RecordingAnswerCache:
+    def __init__(self):
+        self.stored = []
+
+    def get(self, question):
+        return None, None
+
+    def put(self, question, answer):
+        self.stored.append(answer)
+
+def test_stream_skips_the_filter_only_chunk():
+    async def test(client):
+        return [delta async for delta in client.stream("system", "user", max_tokens=10)]
+
+    assert asyncio.run(with_sse_server(["Run ", "deploy.sh"], test)) == ["Run ", "deploy.sh"]
+
+def test_streamed_reply_edits_are_throttled():
+    deltas = [f"word{i} " for i in range(10)]
+    context = FakeTurnContext()
+
+    async def test(client):
+        reply = StreamingReply(context, interval=0.2)
+        text = ""
+        async for delta in client.stream("system", "user", max_tokens=10):
+            text += delta
+            await reply.update(text)
+        await reply.finish(text)
+
+    asyncio.run(with_sse_server(deltas, test, delay=0.05))
+
+    assert context.sent == ["word0 "]
+    # Ten deltas over about half a second: a handful of edits, not one per delta, and the last is the whole answer.
+    assert 1 <= len(context.updates) <= 4
+    assert context.updates[-1] == ("activity-1", "".join(deltas))
+
+def test_reply_without_activity_id_sends_the_final_answer_separately():
+    context = FakeTurnContext(activity_ids=False)
+
+    async def test(client):
+        reply = StreamingReply(context, interval=0)
+        text = ""
+        async for delta in client.stream("system", "user", max_tokens=10):
+            text += delta
+            await reply.update(text)
+        await reply.finish(text)
+
+    asyncio.run(with_sse_server(["Run ", "deploy.sh"], test))
+
+    assert context.updates == []
+    assert context.sent == ["Run ", "Run deploy.sh"]
+
+def test_timeout_mid_stream_keeps_the_streamed_text(monkeypatch):
+    monkeypatch.setattr(bot.CONFIG, "ANSWER_TIMEOUT_SECONDS", 0.5)
+    cache = RecordingAnswerCache()
+    shown = []
+
+    async def on_text(text):
+        shown.append(text)
+
+    async def test(client):
+        return await MyBot(StubQueryEngine(), client, cache).answer("how do I deploy", on_text=on_text)
+
+    answer = asyncio.run(with_sse_server(["Run ", "deploy.sh"], test, stall=True))
+
+    assert shown == ["Run ", "Run deploy.sh"]
+    assert answer == "Run deploy.sh" + bot.ANSWER_TRUNCATED_NOTE
+    assert cache.stored == []
+
+def test_timeout_before_any_text_falls_back_to_the_search_results(monkeypatch):
+    monkeypatch.setattr(bot.CONFIG, "ANSWER_TIMEOUT_SECONDS", 0.3)
+
+    async def on_text(text):
+        raise AssertionError("nothing should have been streamed")
+
+    async def test(client):
+        return await MyBot(StubQueryEngine(), client).answer("how do I deploy", on_text=on_text)
+
+    answer = asyncio.run(with_sse_server([], test, stall=True))
+
+    assert answer.startswith("I couldn't generate an answer right now.")
+    assert "Run deploy.sh from the release branch." in answer
+
+def test_llm_stage_excludes_the_time_spent_updating_the_reply():
+    series = lambda: dict(bot.STAGE_LATENCY.values.get(("llm",), {"sum": 0.0, "count": 0}))
+    before = series()
+
+    async def on_text(text):
+        # A slow channel: each send or edit of the reply takes a while.
+        await asyncio.sleep(0.2)
+
+    async def test(client):
+        return await MyBot(StubQueryEngine(), client).answer("how do I deploy", on_text=on_text)
+
+    answer = asyncio.run(with_sse_server(["Run ", "deploy", ".sh"], test))
+
+    after = series()
+    assert answer == "Run deploy.sh"
+    assert after["count"] == before["count"] + 1
+    assert after["sum"] - before["sum"] < 0.2
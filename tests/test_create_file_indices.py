@@ -0,0 +1,25 @@
+import importlib.util
+from datetime import datetime, timezone
+
+from file_source import SourceFile
+
+spec = importlib.util.spec_from_file_location("create_file_indices", "create-file-indices.py")
+create_file_indices = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(create_file_indices)
+
+QA_PAIRS = [
+    {"question": "What is step one?", "answer": "Drain the slot.", "page": 2},
+    {"question": "What is step two?", "answer": "Swap.", "page": 7},
+    {"question": "What is step three?", "answer": "Verify.", "page": "two"},
+]
+
+def blob(name):
+    return SourceFile(name, 100, datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+def test_markdown_pairs_never_get_a_page():
+    documents = create_file_indices.build_documents(blob("guide.md"), QA_PAIRS)
+    assert [doc["page"] for doc in documents] == [None, None, None]
+
+def test_pdf_pages_outside_the_document_are_dropped():
+    documents = create_file_indices.build_documents(blob("guide.pdf"), QA_PAIRS, page_count=3)
+    assert [doc["page"] for doc in documents] == [2, None, None]
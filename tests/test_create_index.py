@@ -0,0 +1,157 @@
+import asyncio
+from types import SimpleNamespace
+
+import create_index
+from chunker import count_tokens
+from index_manifest import IndexManifest
+from llm_client import ChatCompletionError
+from transcript_parser import format_timestamp
+
+class FakeSearch:
+    def __init__(self, monkeypatch):
+        self.deleted = []
+        self.merged = []
+        monkeypatch.setattr(create_index, "ensure_index", lambda *args: None)
+        monkeypatch.setattr(create_index, "merge_or_upload_documents",
+                            lambda service, key, index_name, documents: self.merged.append((index_name, len(documents))))
+        monkeypatch.setattr(create_index, "delete_documents",
+                            lambda service, key, index_name, doc_ids: self.deleted.append((index_name, list(doc_ids))))
+
+def test_removed_sources_are_deleted_from_their_recorded_index(tmp_path, monkeypatch):
+    search = FakeSearch(monkeypatch)
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.record("https://example.com/kept", "a", "index-kept", ["kept-0"])
+    manifest.record("https://example.com/dropped", "b", "index-dropped", ["dropped-0", "dropped-1"])
+    manifest.record("old.txt", "c", "meeting-transcripts", ["old-0"])
+
+    create_index.prune_removed_sources(manifest, {"https://example.com/kept"})
+
+    assert sorted(search.deleted) == [("index-dropped", ["dropped-0", "dropped-1"]), ("meeting-transcripts", ["old-0"])]
+    assert list(IndexManifest(manifest.path).sources) == ["https://example.com/kept"]
+
+def test_moved_source_is_deleted_from_its_old_index(tmp_path, monkeypatch):
+    search = FakeSearch(monkeypatch)
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.record("https://example.com/a", "a", "index-a", ["a-0", "a-1"])
+
+    create_index.sync_source_documents(manifest, "https://example.com/a", "a", "unified", [{"id": "u-0"}])
+
+    assert search.merged == [("unified", 1)]
+    assert search.deleted == [("index-a", ["a-0", "a-1"])]
+    assert manifest.get("https://example.com/a")["index_name"] == "unified"
+
+def test_each_page_uploads_only_its_own_documents(monkeypatch):
+    uploads = []
+    monkeypatch.setattr(create_index, "upload_documents",
+                        lambda service, key, index_name, documents: uploads.append((index_name, len(documents))))
+    qa_pairs = [{"question": f"Question {i}?", "answer": f"Answer {i}."} for i in range(3)]
+    content_chunks = ["first chunk", "second chunk"]
+    urls = [f"https://example.com/page-{i}" for i in range(5)]
+
+    for url in urls:
+        item = {"url": url, "page": SimpleNamespace(title=url), "content_chunks": content_chunks,
+                "qa_pairs": qa_pairs, "digest": "digest", "index_name": "unified"}
+        create_index.upload_page_item(item, None, unified_index="unified")
+
+    per_page = len(qa_pairs) + len(content_chunks)
+    assert uploads == [("unified", per_page)] * len(urls)
+
+def test_long_transcript_is_enhanced_and_uploaded_a_batch_at_a_time(tmp_path, monkeypatch):
+    search = FakeSearch(monkeypatch)
+    events = []
+
+    async def enhance(llm_client, texts, identifier):
+        events.append(("enhance", len(texts)))
+        return [text.upper() for text in texts]
+
+    monkeypatch.setattr(create_index, "enhance_texts_via_ai", enhance)
+    monkeypatch.setattr(create_index, "merge_or_upload_documents",
+                        lambda service, key, index_name, documents: events.append(("upload", len(documents))))
+    # Eight hours, a turn every 10 seconds: one segment per five-minute window.
+    path = tmp_path / "all-hands.txt"
+    with open(path, "w", encoding="utf-8") as f:
+        for second in range(0, 8 * 3600, 10):
+            f.write(f"{format_timestamp(second)}\nNick: Update number {second} on the rollout.\n")
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.record("all-hands.txt", "old", "transcripts", ["stale-id"])
+
+    item = {"filename": "all-hands.txt", "path": str(path), "digest": "new"}
+    asyncio.run(create_index.index_transcript_item(None, item, manifest, "transcripts"))
+
+    batch = create_index.TRANSCRIPT_BATCH_SEGMENTS
+    segments = 8 * 3600 // 300
+    expected = [(stage, min(batch, segments - start)) for start in range(0, segments, batch) for stage in ("enhance", "upload")]
+    assert events == expected
+    recorded = manifest.get("all-hands.txt")
+    assert recorded["content_hash"] == "new" and len(set(recorded["doc_ids"])) == segments
+    assert search.deleted == [("transcripts", ["stale-id"])]
+
+class StubEnhanceClient:
+    """
+    Upper-cases whatever it is asked to improve. Every third batched request loses one chunk
+    from its reply, like a reply cut short; failing_texts raise ChatCompletionError when sent alone.
+    """
+    def __init__(self, failing_texts=()):
+        self.failing_texts = set(failing_texts)
+        self.batch_calls = 0
+        self.single_calls = []
+
+    async def complete(self, system_prompt, user_prompt, max_tokens=4000, identifier=""):
+        await asyncio.sleep(0)
+        chunks = create_index.CHUNK_DELIMITER.findall(user_prompt)
+        if not chunks:
+            text = user_prompt.split("\n\n", 1)[1]
+            self.single_calls.append(text)
+            if text in self.failing_texts:
+                raise ChatCompletionError("HTTP 500")
+            return text.upper()
+        self.batch_calls += 1
+        if self.batch_calls % 3 == 0:
+            chunks = chunks[:1] + chunks[2:]
+        return "\n\n".join(f"<<<CHUNK {n}>>>\n{text.upper()}\n<<<END CHUNK {n}>>>" for n, text in chunks)
+
+def test_enhance_batches_respect_the_token_budget():
+    texts = [f"Speaker {i}: " + "word " * (5 + 7 * (i % 4)) for i in range(30)] + ["long " * 400]
+    budget = 100
+
+    batches = create_index.pack_enhance_batches(texts, max_tokens=budget, max_chunks=6)
+
+    assert [idx for batch in batches for idx in batch] == list(range(len(texts)))
+    for batch in batches:
+        assert len(batch) <= 6
+        assert len(batch) == 1 or sum(count_tokens(texts[idx]) for idx in batch) <= budget
+    # The chunk over the budget is sent on its own.
+    assert batches[-1] == [len(texts) - 1]
+
+def test_split_enhance_batch_response_keeps_only_usable_chunks():
+    reply = ("<<<CHUNK 1>>>\nFirst.\n<<<END CHUNK 1>>>\n"
+             "<<<CHUNK 2>>>\n   \n<<<END CHUNK 2>>>\n"
+             "<<<CHUNK 1>>>\nFirst again.\n<<<END CHUNK 1>>>\n"
+             "<<<CHUNK 4>>>\nFourth.\n<<<END CHUNK 4>>>\n"
+             "<<<CHUNK 5>>>\nOut of range.\n<<<END CHUNK 5>>>")
+
+    assert create_index.split_enhance_batch_response(reply, 4) == {1: "First.", 4: "Fourth."}
+    assert create_index.split_enhance_batch_response(None, 4) == {}
+
+def test_chunks_missing_from_a_batch_are_retried_alone_in_order():
+    texts = [f"chunk {i} of the stand-up" for i in range(80)]
+    client = StubEnhanceClient()
+
+    improved = asyncio.run(create_index.enhance_texts_via_ai(client, texts, "standup.txt"))
+
+    assert improved == [text.upper() for text in texts]
+    batches = create_index.pack_enhance_batches(texts)
+    assert client.batch_calls == len(batches)
+    # One chunk lost from every third batch, each sent again on its own.
+    assert len(client.single_calls) == len(batches) // 3
+
+def test_a_chunk_that_cannot_be_enhanced_keeps_its_original_text():
+    texts = [f"chunk {i} of the stand-up" for i in range(8)]
+    # The third batch drops its second chunk, and that chunk then fails on its own too.
+    client = StubEnhanceClient(failing_texts=[texts[1]])
+    client.batch_calls = 2
+
+    improved = asyncio.run(create_index.enhance_texts_via_ai(client, texts, "standup.txt"))
+
+    assert client.single_calls == [texts[1]]
+    assert improved == [texts[0].upper(), texts[1]] + [text.upper() for text in texts[2:]]
@@ -0,0 +1,22 @@
+import asyncio
+
+import fitz
+
+from file_extract import PdfExtractor, extract_pdf_page_range
+
+def make_pdf(page_count):
+    with fitz.open() as document:
+        for number in range(1, page_count + 1):
+            document.new_page().insert_text((72, 72), f"This is page {number}")
+        return document.tobytes()
+
+def test_pool_extraction_matches_serial_extraction():
+    data = make_pdf(40)
+
+    async def extract():
+        with PdfExtractor(workers=3, min_pages_per_task=8) as extractor:
+            return await extractor.pages(data)
+
+    pages = asyncio.run(extract())
+    assert [page.number for page in pages] == list(range(1, 41))
+    assert pages == extract_pdf_page_range(data, 0, 40)
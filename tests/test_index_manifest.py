@@ -0,0 +1,35 @@
+import json
+import threading
+
+from index_manifest import IndexManifest
+
+def test_concurrent_records_are_all_saved(tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = IndexManifest(str(path))
+    errors = []
+
+    def record_many(worker):
+        for i in range(200):
+            try:
+                manifest.record(f"source-{worker}-{i}", "digest", "index", [f"doc-{worker}-{i}"])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=record_many, args=(worker,)) for worker in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    saved = json.loads(path.read_text(encoding="utf-8"))["sources"]
+    assert len(saved) == 400
+    assert list(tmp_path.iterdir()) == [path]
+
+def test_manifest_round_trips(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    IndexManifest(path).record("https://example.com/a", "abc", "index-a", ["a-0", "a-1"])
+    manifest = IndexManifest(path)
+    assert manifest.is_unchanged("https://example.com/a", "abc", "index-a")
+    assert not manifest.is_unchanged("https://example.com/a", "abc", "index-b")
+    assert manifest.stale_ids("https://example.com/a", ["a-0"]) == ["a-1"]
@@ -0,0 +1,61 @@
+import os
+import asyncio
+
+from llm_cache import LLMCache, cache_key
+import create_index
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    assert cache.get("a") is None
+    cache.put("a", "first answer")
+    assert cache.get("a") == "first answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    # Random hex compresses to about half, the same for every value.
+    values = {key: os.urandom(500).hex() for key in "abcd"}
+    cache = LLMCache(path)
+    cache.put("a", values["a"])
+    # Room for three entries but not four.
+    cache.max_bytes = int(cache._total_bytes * 3.5)
+    for key in "bc":
+        cache.put(key, values[key])
+    assert cache.get("a") == values["a"]  # a is now more recently used than b
+    cache.put("d", values["d"])
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == [values[key] for key in "acd"]
+    assert cache._total_bytes <= cache.max_bytes
+    cache.close()
+    # The stored size survives a reopen.
+    assert LLMCache(path)._total_bytes == cache._total_bytes
+
+class FakeChatClient:
+    def __init__(self, cache, reply):
+        self.cache = cache
+        self.reply = reply
+        self.calls = 0
+
+    async def complete(self, system_prompt, user_prompt, max_tokens=4000, identifier=""):
+        key = cache_key("gpt", system_prompt, user_prompt, max_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        self.calls += 1
+        self.cache.put(key, self.reply)
+        return self.reply
+
+    async def forget(self, system_prompt, user_prompt, max_tokens=4000):
+        self.cache.delete(cache_key("gpt", system_prompt, user_prompt, max_tokens))
+
+def test_unparseable_qa_reply_is_not_served_from_the_cache_again(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+    client = FakeChatClient(cache, "Sorry, I cannot help with that.")
+    assert asyncio.run(create_index.generate_qa_pairs(client, "page text", "https://example.com")) == []
+    client.reply = '[{"question": "What?", "answer": "That."}]'
+    pairs = asyncio.run(create_index.generate_qa_pairs(client, "page text", "https://example.com"))
+    assert pairs == [{"question": "What?", "answer": "That."}]
+    assert client.calls == 2
+    assert cache._total_bytes > 0
+    cache.close()
@@ -0,0 +1,91 @@
+import time
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from llm_client import AsyncChatClient, ChatCompletionError, TokenBucket
+
+def reply(content):
+    return web.json_response({"choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]})
+
+async def with_server(responses, test):
+    """
+    Serve POST / from a list of handler results, one per request (the last one repeats),
+    and run test(client, requests) against it; requests collects each request's arrival time.
+    """
+    requests = []
+
+    async def handler(request):
+        await request.json()
+        requests.append(time.monotonic())
+        response = responses[min(len(requests), len(responses)) - 1]
+        return response() if callable(response) else response
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    async with TestServer(app) as server:
+        async with AsyncChatClient(endpoint=str(server.make_url("/")), api_key="key", deployment="gpt",
+                                   max_retries=3, backoff_base=0.01) as client:
+            return await test(client, requests)
+
+def run(responses, test):
+    return asyncio.run(with_server(responses, test))
+
+def test_429_waits_for_retry_after_then_succeeds():
+    responses = [lambda: web.json_response({"error": {"message": "Rate limit"}}, status=429, headers={"Retry-After": "0.3"}),
+                 lambda: reply(" answer ")]
+
+    async def test(client, requests):
+        return await client.complete("system", "user", max_tokens=10), requests
+
+    content, requests = run(responses, test)
+    assert content == "answer"
+    assert len(requests) == 2 and requests[1] - requests[0] >= 0.3
+
+def test_transient_errors_back_off_until_retries_run_out():
+    async def test(client, requests):
+        with pytest.raises(ChatCompletionError, match="HTTP 503"):
+            await client.complete("system", "user", max_tokens=10)
+        return requests
+
+    assert len(run([lambda: web.json_response({}, status=503)], test)) == 3
+
+def test_client_errors_are_not_retried():
+    async def test(client, requests):
+        with pytest.raises(ChatCompletionError, match="HTTP 400"):
+            await client.complete("system", "user", max_tokens=10)
+        return requests
+
+    assert len(run([lambda: web.json_response({"error": {"message": "bad"}}, status=400)], test)) == 1
+
+@pytest.mark.parametrize("body", [{"choices": []}, {"choices": [{"message": {"content": None}, "finish_reason": "content_filter"}]}])
+def test_reply_without_text_raises_chat_completion_error(body):
+    async def test(client, requests):
+        with pytest.raises(ChatCompletionError):
+            await client.complete("system", "user", max_tokens=10)
+        return requests
+
+    assert len(run([lambda: web.json_response(body)], test)) == 1
+
+def test_request_budget_spaces_out_requests():
+    async def test(client, requests):
+        # Ten requests a second with room for a single one at a time.
+        client.request_bucket = TokenBucket(600, burst_seconds=0.1)
+        await asyncio.gather(*(client.complete("system", f"user {i}", max_tokens=10) for i in range(5)))
+        return requests
+
+    requests = run([lambda: reply("ok")], test)
+    assert requests[-1] - requests[0] >= 0.35
+
+def test_token_bucket_charges_by_amount():
+    async def main():
+        bucket = TokenBucket(6000, burst_seconds=0.1)  # 100 tokens a second, 10 at once
+        start = time.monotonic()
+        await bucket.acquire(10)
+        await bucket.acquire(10)
+        await bucket.acquire(5)
+        return time.monotonic() - start
+
+    assert 0.14 <= asyncio.run(main()) < 0.5
@@ -0,0 +1,78 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import query_agent
+
+class FakeSearchService:
+    """
+    The search REST API for two indexes: "unified" answers, "stuck" accepts the query and never
+    replies. While down, every request gets a 503, as during an outage or a credential rollout.
+    """
+    def __init__(self):
+        self.up = False
+        self.app = web.Application()
+        self.app.router.add_post("/indexes/{index}/docs/search", self.search)
+
+    async def search(self, request):
+        if not self.up:
+            return web.json_response({"error": {"message": "Service unavailable"}}, status=503)
+        body = await request.json()
+        if body.get("count"):
+            return web.json_response({"@odata.count": 1, "value": [{"upload_date": "2026-10-01T00:00:00Z"}]})
+        if request.match_info["index"] == "stuck":
+            await asyncio.sleep(3600)
+        return web.json_response({"value": [{"@search.score": 1.0, "title": "Deploying",
+                                             "content": "Run deploy.sh from the release branch."}]})
+
+class FakeChatService:
+    def __init__(self):
+        self.prompts = []
+        self.app = web.Application()
+        self.app.router.add_post("/", self.complete)
+
+    async def complete(self, request):
+        body = await request.json()
+        self.prompts.append(body["messages"][-1]["content"])
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": "Run deploy.sh."},
+                                               "finish_reason": "stop"}]})
+
+def test_bot_starts_while_search_is_down_and_answers_without_the_stuck_index(monkeypatch):
+    search, chat = FakeSearchService(), FakeChatService()
+    monkeypatch.setattr(query_agent.CONFIG, "SEARCH_API_KEY", "query-key")
+    monkeypatch.setattr(query_agent.CONFIG, "SEARCH_INDEXES", ["unified", "stuck"])
+    monkeypatch.setattr(query_agent.CONFIG, "SEARCH_TIMEOUT_SECONDS", 0.3)
+    monkeypatch.setattr(query_agent.CONFIG, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(query_agent, "STARTUP_RETRY_SECONDS", 0.05)
+
+    async def main():
+        async with TestServer(search.app) as search_server, TestServer(chat.app) as chat_server:
+            monkeypatch.setenv("SEARCH_ENDPOINT", str(search_server.make_url("")).rstrip("/"))
+            async with TestServer(query_agent.create_app()) as bot_server, aiohttp.ClientSession() as http:
+                async def readyz():
+                    async with http.get(bot_server.make_url("/readyz")) as response:
+                        return response.status
+
+                await asyncio.sleep(0.2)
+                assert await readyz() == 503
+                search.up = True
+                for _ in range(50):
+                    if await readyz() == 200:
+                        break
+                    await asyncio.sleep(0.05)
+                assert await readyz() == 200
+
+                query_agent.BOT.llm_client.endpoint = str(chat_server.make_url("/"))
+                answer = await query_agent.BOT.answer("how do I deploy")
+                cached, _ = query_agent.BOT.answer_cache.get("how do I deploy")
+                return answer, cached
+
+    answer, cached = asyncio.run(main())
+
+    assert answer == "Run deploy.sh."
+    assert len(chat.prompts) == 1 and "Run deploy.sh from the release branch." in chat.prompts[0]
+    # An answer built without one of the indexes is not cached.
+    assert cached is None
+    assert query_agent.STATE["ready"] is False
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from query_engine import QueryEngine
+from search_client import AsyncSearchClient, SearchError
+
+class StubSearchClient:
+    """Answers each index from a fixed list of hits after a fixed delay, or raises the given error."""
+    def __init__(self, results, delays=None):
+        self.results = results
+        self.delays = delays or {}
+
+    async def search(self, index_name, query, top=5, select=None, filter=None, timeout=None):
+        await asyncio.sleep(self.delays.get(index_name, 0))
+        hits = self.results[index_name]
+        if isinstance(hits, Exception):
+            raise hits
+        return [dict(hit) for hit in hits[:top]]
+
+def doc(content, **fields):
+    return {"content": content, **fields}
+
+def test_fuse_ranks_by_reciprocal_rank_and_sums_duplicates():
+    engine = QueryEngine(None, [], rrf_k=60)
+    a_only, shared, b_only = doc("rotate the signing keys"), doc("deploy from the release branch"), doc("roll back with helm")
+
+    fused = engine.fuse([[a_only, shared], [dict(shared, id="copy"), b_only]], top_k=5)
+
+    assert [d["content"] for d in fused] == [shared["content"], a_only["content"], b_only["content"]]
+    assert fused[0]["@fusion.score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1]["@fusion.score"] == pytest.approx(1 / 61)
+    # Punctuation and case do not make a chunk a different one.
+    assert len(engine.fuse([[doc("Deploy, from the release branch!")], [shared]], top_k=5)) == 1
+
+def test_fuse_drops_overlapping_chunks_and_stops_at_top_k():
+    engine = QueryEngine(None, [])
+    text = "the deploy script runs from the release branch every night"
+    ranked = [doc(text), doc(text + " at two"), doc("certificates are renewed by the platform team"), doc("unrelated third hit")]
+
+    fused = engine.fuse([ranked], top_k=2)
+
+    assert [d["content"] for d in fused] == [text, "certificates are renewed by the platform team"]
+
+def test_query_leaves_out_slow_and_failing_indexes():
+    client = StubSearchClient({"fast": [doc("deploy from the release branch")], "slow": [doc("never arrives")],
+                               "broken": SearchError("HTTP 500")}, delays={"slow": 5})
+    engine = QueryEngine(client, ["fast", "slow", "broken"], deadline=0.2)
+
+    result = asyncio.run(engine.query("how do I deploy"))
+
+    assert result.elapsed < 1
+    assert result.timed_out == ["slow"] and result.failed == ["broken"]
+    assert [(d["content"], d["@search.index"]) for d in result.documents] == [("deploy from the release branch", "fast")]
+
+def test_search_raises_search_error_for_a_body_that_is_not_json():
+    async def handler(request):
+        return web.Response(text="<html>Bad gateway</html>", content_type="text/html")
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/indexes/{index}/docs/search", handler)
+        async with TestServer(app) as server:
+            async with AsyncSearchClient("unused", "key", endpoint=str(server.make_url("")).rstrip("/")) as client:
+                with pytest.raises(SearchError, match="not JSON"):
+                    await client.search("unified", "deploy")
+                result = await QueryEngine(client, ["unified"]).query("deploy")
+        return result
+
+    result = asyncio.run(main())
+    assert result.failed == ["unified"] and result.documents == []
@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraper_pool import ScraperPool, HttpFetcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "html")
+PAGES = sorted(os.listdir(FIXTURES))
+PAGE_DELAY_SECONDS = 0.2
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    # Each page takes a while, like an authenticated page that renders server-side.
+    def do_GET(self):
+        time.sleep(PAGE_DELAY_SECONDS)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def fixture_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(SlowHandler, directory=FIXTURES))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class RecordingFactory:
+    """Creates HttpFetchers and remembers them, and which of them got closed."""
+    def __init__(self):
+        self.fetchers = []
+        self.closed = []
+
+    def __call__(self):
+        fetcher = HttpFetcher(timeout=5)
+        close = fetcher.close
+        def record_close():
+            self.closed.append(fetcher)
+            close()
+        fetcher.close = record_close
+        self.fetchers.append(fetcher)
+        return fetcher
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def test_fetchers_are_reused_across_urls(fixture_site):
+    factory = RecordingFactory()
+    urls = [f"{fixture_site}/{page}" for page in PAGES * 4]
+
+    with ScraperPool(workers=3, fetcher_factory=factory) as pool:
+        results = list(pool.scrape_all(urls))
+
+    assert [url for url, _ in results] == urls
+    assert [html for _, html in results] == [read_fixture(page) for page in PAGES * 4]
+    assert 1 <= len(factory.fetchers) <= 3
+    assert sorted(map(id, factory.closed)) == sorted(map(id, factory.fetchers))
+
+def test_workers_fetch_in_parallel(fixture_site):
+    urls = [f"{fixture_site}/{page}" for page in PAGES * 4]
+
+    start = time.perf_counter()
+    with ScraperPool(workers=4, fetcher_factory=RecordingFactory()) as pool:
+        results = list(pool.scrape_all(urls))
+    elapsed = time.perf_counter() - start
+
+    assert all(html for _, html in results)
+    # Twelve pages at 0.2s each: 2.4s one at a time, three rounds of four with four workers.
+    assert elapsed < len(urls) * PAGE_DELAY_SECONDS / 2
+
+def test_failing_fetcher_is_discarded_and_replaced(fixture_site):
+    factory = RecordingFactory()
+    urls = [f"{fixture_site}/{PAGES[0]}", f"{fixture_site}/missing.html", f"{fixture_site}/{PAGES[1]}"]
+
+    with ScraperPool(workers=1, fetcher_factory=factory) as pool:
+        results = [html for _, html in pool.scrape_all(urls)]
+        assert factory.closed == [factory.fetchers[0]]
+        assert pool._fetchers == [factory.fetchers[1]]
+
+    assert results == [read_fixture(PAGES[0]), "", read_fixture(PAGES[1])]
+    assert len(factory.fetchers) == 2
+    assert factory.closed == factory.fetchers
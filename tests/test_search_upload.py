@@ -0,0 +1,133 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import search_upload
+from search_upload import BulkUploader
+
+class FakeIndexService:
+    """
+    A local stand-in for the documents index REST API. respond(keys) returns (status, results) for one
+    request, where results maps each key to a per-document status code; every request's keys are kept.
+    """
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        self.lock = threading.Lock()
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                keys = [doc["id"] for doc in body["value"]]
+                with service.lock:
+                    service.requests.append(keys)
+                status, results = service.respond(keys)
+                payload = json.dumps({"value": [{"key": key, "status": code in (200, 201), "statusCode": code,
+                                                 "errorMessage": None if code in (200, 201) else f"code {code}"}
+                                                for key, code in results.items()]}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def fake_service(monkeypatch):
+    # No backoff between retries.
+    monkeypatch.setattr(search_upload.random, "uniform", lambda low, high: 0)
+    services = []
+
+    def start(respond):
+        services.append(FakeIndexService(respond))
+        return services[-1]
+
+    yield start
+    for service in services:
+        service.close()
+
+def all_ok(keys):
+    return 200, {key: 200 for key in keys}
+
+def documents(count, content="x"):
+    return [{"id": f"doc-{i}", "content": content} for i in range(count)]
+
+def test_batches_are_bounded_by_count(fake_service):
+    service = fake_service(all_ok)
+    uploader = BulkUploader("unused", "key", endpoint=service.endpoint, max_docs=3, workers=2)
+
+    report = uploader.upload("index", documents(7))
+
+    assert sorted(len(keys) for keys in service.requests) == [1, 3, 3]
+    assert report.succeeded == 7 and report.failed == []
+
+def test_batches_are_bounded_by_bytes(fake_service):
+    service = fake_service(all_ok)
+    docs = documents(6, content="y" * 1000)
+    doc_bytes = len(json.dumps({"@search.action": "upload", **docs[0]}).encode("utf-8"))
+    uploader = BulkUploader("unused", "key", endpoint=service.endpoint, max_docs=1000, max_bytes=2 * doc_bytes + 10)
+
+    report = uploader.upload("index", docs)
+
+    assert [len(keys) for keys in service.requests] == [2, 2, 2]
+    assert report.succeeded == 6
+
+def test_payload_too_large_is_split_until_it_fits(fake_service):
+    service = fake_service(lambda keys: (413, {}) if len(keys) > 2 else all_ok(keys))
+    uploader = BulkUploader("unused", "key", endpoint=service.endpoint, max_docs=1000, workers=1)
+
+    report = uploader.upload("index", documents(8))
+
+    assert [len(keys) for keys in service.requests] == [8, 4, 2, 2, 4, 2, 2]
+    assert report.succeeded == 8 and report.failed == []
+
+def test_only_transient_failures_are_resent(fake_service):
+    attempts = {}
+
+    def respond(keys):
+        results = {}
+        for key in keys:
+            attempts[key] = attempts.get(key, 0) + 1
+            if key == "doc-1":
+                results[key] = 400
+            elif key == "doc-2" and attempts[key] == 1:
+                results[key] = 503
+            elif key == "doc-3":
+                results[key] = 422
+            else:
+                results[key] = 200
+        return 207, results
+
+    service = fake_service(respond)
+    uploader = BulkUploader("unused", "key", endpoint=service.endpoint, max_retries=2)
+
+    report = uploader.merge_or_upload("index", documents(4))
+
+    assert service.requests == [["doc-0", "doc-1", "doc-2", "doc-3"], ["doc-2", "doc-3"], ["doc-3"]]
+    assert report.action == "mergeOrUpload"
+    assert report.succeeded == 2
+    assert sorted(report.failed) == [("doc-1", "code 400"), ("doc-3", "code 422")]
+    assert "2 document(s) into index" in str(report) and "2 failed" in str(report)
+
+def test_failed_batch_is_reported_per_key(fake_service):
+    service = fake_service(lambda keys: (400, {}))
+    uploader = BulkUploader("unused", "key", endpoint=service.endpoint)
+
+    report = uploader.delete("index", ["a", "b"])
+
+    assert len(service.requests) == 1
+    assert report.succeeded == 0 and [key for key, _ in report.failed] == ["a", "b"]
+    assert all(message.startswith("HTTP 400") for _, message in report.failed)
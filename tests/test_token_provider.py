@@ -0,0 +1,109 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+from token_provider import TokenProvider
+
+class FakeCredential:
+    """An async credential whose token requests take delay seconds and whose tokens live lifetime seconds."""
+    def __init__(self, delay=0.1, lifetime=3600, error=None):
+        self.delay = delay
+        self.lifetime = lifetime
+        self.error = error
+        self.calls = 0
+
+    async def get_token(self, scope):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(token=f"token-{call}", expires_on=time.time() + self.lifetime)
+
+def test_cold_callers_share_one_credential_call():
+    credential = FakeCredential()
+    provider = TokenProvider(credential, "scope")
+
+    async def main():
+        return await asyncio.gather(*(provider.get_token() for _ in range(50)))
+
+    tokens = asyncio.run(main())
+
+    assert credential.calls == 1
+    assert set(tokens) == {"token-1"}
+
+def test_refresh_inside_the_margin_runs_in_the_background():
+    credential = FakeCredential(delay=0.2, lifetime=120)
+    provider = TokenProvider(credential, "scope", refresh_margin=300)
+
+    async def main():
+        first = await provider.get_token()
+        # Inside the margin but not yet expired: the current token comes back without waiting for the refresh.
+        start = time.perf_counter()
+        during = await asyncio.gather(*(provider.get_token() for _ in range(10)))
+        waited = time.perf_counter() - start
+        await asyncio.sleep(0.3)
+        return first, during, waited
+
+    first, during, waited = asyncio.run(main())
+
+    assert first == "token-1" and set(during) == {"token-1"}
+    assert waited < 0.1
+    assert credential.calls == 2 and provider.refreshes == 2
+    assert provider._token.token == "token-2"
+
+def test_a_caller_giving_up_does_not_cancel_the_refresh_for_the_others():
+    credential = FakeCredential(delay=0.2)
+    provider = TokenProvider(credential, "scope")
+
+    async def main():
+        impatient = asyncio.wait_for(provider.get_token(), 0.05)
+        patient = provider.get_token()
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    impatient, patient = asyncio.run(main())
+
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "token-1" and credential.calls == 1
+
+def test_failed_refresh_reaches_the_waiting_callers_and_is_retried():
+    credential = FakeCredential(error=RuntimeError("IMDS unavailable"))
+    provider = TokenProvider(credential, "scope")
+
+    async def main():
+        results = await asyncio.gather(*(provider.get_token() for _ in range(5)), return_exceptions=True)
+        credential.error = None
+        return results, await provider.get_token()
+
+    results, token = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert token == "token-2" and credential.calls == 2
+
+def test_synchronous_credentials_run_off_the_event_loop():
+    class SyncCredential:
+        def get_token(self, scope):
+            time.sleep(0.2)
+            return SimpleNamespace(token="sync-token", expires_on=time.time() + 3600)
+
+    provider = TokenProvider(SyncCredential(), "scope")
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        token = await provider.get_token()
+        task.cancel()
+        return token, ticks
+
+    token, ticks = asyncio.run(main())
+
+    assert token == "sync-token"
+    # The loop kept running while the credential blocked.
+    assert ticks >= 5
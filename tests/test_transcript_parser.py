@@ -0,0 +1,22 @@
+from chunker import count_tokens
+from transcript_parser import parse_transcript, segment_transcript
+
+def test_timestamped_transcript_skips_the_title():
+    utterances = list(parse_transcript(["Office hours", "0:02", "Nick: hello", "1:05", "Bob: deploy at noon"]))
+    assert [(u.start, u.speaker, u.text) for u in utterances] == [(2, "Nick", "hello"), (65, "Bob", "deploy at noon")]
+
+def test_transcript_without_timestamps_is_read_untimed(capsys):
+    utterances = list(parse_transcript(["Nick: hello", "Bob: deploy at noon"], "notes.txt"))
+    assert [(u.start, u.speaker, u.text) for u in utterances] == [(0, "Nick", "hello"), (0, "Bob", "deploy at noon")]
+    assert "No timestamps found in notes.txt" in capsys.readouterr().out
+    segments = list(segment_transcript(utterances))
+    assert len(segments) == 1 and "Bob: deploy at noon" in segments[0].text
+
+def test_oversized_utterance_is_split():
+    monologue = "Nick: " + " ".join(f"Step {i} of the rollout is checked by hand." for i in range(300))
+    lines = ["0:00", "Bob: ready?", "0:10", monologue, "2:00", "Bob: thanks"]
+    segments = list(segment_transcript(parse_transcript(lines), max_tokens=200))
+    assert len(segments) > 3
+    assert all(count_tokens(segment.text) <= 220 for segment in segments)
+    assert [segment.start for segment in segments[1:-1]] == [10] * (len(segments) - 2)
+    assert segments[-1].text == "Bob: thanks"
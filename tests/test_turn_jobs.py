@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from botbuilder.schema import Activity, ActivityTypes, ChannelAccount, ConversationAccount
+
+import query_agent
+from turn_jobs import TurnJobQueue
+
+class FakeAdapter:
+    """Records what the webhook and the job workers ask of the CloudAdapter."""
+    def __init__(self):
+        self.busy_replies = []
+        self.proactive = []
+
+    async def process_activity(self, auth_result, activity, logic):
+        self.busy_replies.append((activity.conversation.id, logic))
+
+    async def continue_conversation(self, reference, callback, bot_app_id=None, claims_identity=None, audience=None):
+        self.proactive.append((reference.conversation.id, claims_identity, audience))
+        await callback(SimpleNamespace(activity=None))
+
+def message(text, conversation_id):
+    return Activity(type=ActivityTypes.message, id=f"{conversation_id}-{text}", text=text, channel_id="msteams",
+                    service_url="https://smba.example.com", from_property=ChannelAccount(id="user"),
+                    recipient=ChannelAccount(id="bot"), conversation=ConversationAccount(id=conversation_id))
+
+def run_with_jobs(monkeypatch, scenario, **queue_options):
+    adapter = FakeAdapter()
+    answered = []
+
+    async def main():
+        # Answers wait here until every request was acknowledged, like slow LLM calls would.
+        gate = asyncio.Event()
+        async def reply(turn_context, question):
+            await gate.wait()
+            answered.append(question)
+        jobs = TurnJobQueue(**queue_options)
+        monkeypatch.setattr(query_agent, "ADAPTER", adapter)
+        monkeypatch.setattr(query_agent, "JOBS", jobs)
+        monkeypatch.setattr(query_agent.BOT, "reply", reply)
+        jobs.start()
+        auth_result = SimpleNamespace(claims_identity="claims", audience="audience")
+        statuses = []
+        for activity in scenario:
+            statuses.append((await query_agent.acknowledge_message(auth_result, activity, 0)).status)
+            # Separate requests: let a free worker pick up what was queued before the next one arrives.
+            await asyncio.sleep(0)
+        gate.set()
+        while jobs.pending:
+            await asyncio.sleep(0.01)
+        await jobs.stop()
+        return statuses
+
+    return asyncio.run(main()), adapter, answered
+
+def test_message_is_acknowledged_then_answered_proactively(monkeypatch):
+    statuses, adapter, answered = run_with_jobs(monkeypatch, [message("how do I deploy", "c1")])
+    assert statuses == [200]
+    assert adapter.busy_replies == []
+    assert adapter.proactive == [("c1", "claims", "audience")]
+    assert answered == ["how do I deploy"]
+
+def test_full_queue_gets_busy_reply(monkeypatch):
+    scenario = [message(f"question {i}", f"c{i}") for i in range(4)]
+    statuses, adapter, answered = run_with_jobs(monkeypatch, scenario, workers=1, queue_size=1)
+    assert statuses == [200] * 4
+    # One job is running, one waits in the queue; the rest are turned away.
+    assert [conversation for conversation, logic in adapter.busy_replies] == ["c2", "c3"]
+    assert all(logic is query_agent.busy_turn for _, logic in adapter.busy_replies)
+    assert answered == ["question 0", "question 1"]
+
+def test_one_conversation_cannot_fill_the_queue(monkeypatch):
+    scenario = [message(f"question {i}", "chatty") for i in range(3)] + [message("quiet question", "quiet")]
+    statuses, adapter, answered = run_with_jobs(monkeypatch, scenario, workers=1, queue_size=8, per_conversation=2)
+    assert [conversation for conversation, _ in adapter.busy_replies] == ["chatty"]
+    assert sorted(answered) == ["question 0", "question 1", "quiet question"]
+
+def test_queue_is_created_on_the_running_loop():
+    jobs = TurnJobQueue(workers=1)
+    assert jobs.queue is None and jobs.pending == 0
+
+    async def main():
+        jobs.start()
+        submitted = asyncio.Event()
+        assert jobs.submit(submitted.wait, conversation_id="c1")
+        await jobs.stop()
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+import os
+import time
+import asyncio
+import inspect
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Start refreshing this long before a token expires; callers keep using the old one meanwhile.
+TOKEN_REFRESH_MARGIN_SECONDS = float(os.environ.get("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+# A token this close to expiry is not handed out any more; callers wait for the new one.
+TOKEN_EXPIRY_SKEW_SECONDS = 30
+
+SEARCH_SCOPE = "https://search.azure.com/.default"
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+BOT_FRAMEWORK_SCOPE = "https://api.botframework.com/.default"
+
+class TokenProvider:
+    """
+    Cached access token for one scope. The token is reused until shortly before it expires;
+    inside the refresh margin a single background refresh is started while callers keep
+    getting the current token, and concurrent callers that find no usable token all wait
+    on the same credential call instead of each making their own.
+
+    Works with both azure.identity and azure.identity.aio credentials (or any object with
+    a get_token(scope) returning something with .token and .expires_on).
+    """
+    def __init__(self, credential, scope, refresh_margin=TOKEN_REFRESH_MARGIN_SECONDS):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self._token = None
+        self._refreshing = None
+
+    async def get_token(self):
+        now = time.time()
+        token = self._token
+        if token is not None and now < token.expires_on - self.refresh_margin:
+            return token.token
+        if token is not None and now < token.expires_on - TOKEN_EXPIRY_SKEW_SECONDS:
+            self._start_refresh()
+            return token.token
+        # Shielded so a caller that gives up (a turn timing out) does not cancel the refresh for everyone else.
+        return (await asyncio.shield(self._start_refresh())).token
+
+    async def authorization_header(self):
+        return f"Bearer {await self.get_token()}"
+
+    def _start_refresh(self):
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+            # Background refreshes have nobody awaiting them; mark their failure as seen (it is logged in _refresh).
+            self._refreshing.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._refreshing
+
+    async def _refresh(self):
+        try:
+            if inspect.iscoroutinefunction(self.credential.get_token):
+                result = await self.credential.get_token(self.scope)
+            else:
+                # Synchronous credentials make a blocking HTTP call; keep it off the event loop.
+                result = await asyncio.to_thread(self.credential.get_token, self.scope)
+            self._token = result
+            self.refreshes += 1
+            logger.info(f"Acquired token for {self.scope}, valid for {result.expires_on - time.time():.0f}s")
+            return result
+        except Exception as e:
+            logger.error(f"Token refresh for {self.scope} failed: {e}")
+            raise
+        finally:
+            self._refreshing = None
+
+def managed_identity_credential(client_id=None):
+    # The async credential keeps token requests off the event loop; close() it on shutdown.
+    from azure.identity.aio import ManagedIdentityCredential
+    return ManagedIdentityCredential(client_id=client_id or os.environ.get("AZURE_CLIENT_ID") or None)
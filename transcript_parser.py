@@ -0,0 +1,189 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+from dotenv import load_dotenv
+
+from chunker import chunk_text, count_tokens, CHUNK_TARGET_TOKENS
+
+load_dotenv()
+
+# A chunk covers at most this much of the recording...
+TRANSCRIPT_WINDOW_SECONDS = int(os.environ.get("TRANSCRIPT_WINDOW_SECONDS", "300"))
+# ...and also closes at a pause this long, which usually marks a change of topic or a demo.
+TRANSCRIPT_PAUSE_SECONDS = int(os.environ.get("TRANSCRIPT_PAUSE_SECONDS", "20"))
+# A transcript with no timestamp in this many lines has none at all and is read as untimed text.
+UNTIMED_AFTER_LINES = 50
+
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{2})(?:[.,]\d+)?"
+# "1:27:25" on a line of its own (Teams/Stream transcript export).
+TIMESTAMP_LINE = re.compile(rf"^\s*{_TIME}\s*$")
+# "Nick Smith   0:02": speaker name and timestamp on one line (Teams .docx export).
+SPEAKER_TIMESTAMP_LINE = re.compile(rf"^\s*((?:[A-Z][\w.'()-]*\s+){{0,4}}[A-Z][\w.'()-]*)\s+{_TIME}\s*$")
+# "00:00:02.000 --> 00:00:05.000" (WebVTT cue timing).
+CUE_LINE = re.compile(rf"^\s*{_TIME}\s+-->\s+{_TIME}")
+# A bare number is a WebVTT cue identifier, not something anyone said.
+CUE_ID_LINE = re.compile(r"^\d+$")
+# "<v Nick Smith>text</v>" (WebVTT voice tag).
+VOICE_TAG = re.compile(r"^<v\s+([^>]+)>(.*?)(?:</v>)?\s*$")
+# "Nick: text" at the start of an utterance.
+SPEAKER_LABEL = re.compile(r"^((?:[A-Z][\w.'-]*\s){0,3}[A-Z][\w.'-]*):\s+(.*)$")
+
+@dataclass
+class Utterance:
+    start: int
+    speaker: str
+    text: str
+    end: int = None
+
+@dataclass
+class TranscriptSegment:
+    start: int
+    end: int
+    speakers: list = field(default_factory=list)
+    text: str = ""
+
+    @property
+    def start_time(self):
+        return format_timestamp(self.start)
+
+    @property
+    def end_time(self):
+        return format_timestamp(self.end)
+
+def _seconds(hours, minutes, seconds):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+def format_timestamp(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+def _untimed(line):
+    voice = VOICE_TAG.match(line) or SPEAKER_LABEL.match(line)
+    if voice:
+        return Utterance(0, voice.group(1).strip(), voice.group(2).strip())
+    return Utterance(0, "", line)
+
+def parse_transcript(lines, name="transcript"):
+    """
+    Yield an Utterance(start, speaker, text) per timestamped turn from an iterable of lines
+    (an open file works), in one pass and holding only the current turn. Understands
+    timestamp-only lines, "Speaker  0:02" lines, "Speaker: text" labels and WebVTT cues;
+    anything before the first timestamp (the recording title) is skipped. The speaker is ""
+    when the transcript does not name one. end is only known for WebVTT cues.
+
+    A transcript without timestamps (none in its first UNTIMED_AFTER_LINES lines) is read
+    with a warning as one untimed utterance per line, all starting at 0.
+    """
+    current = None
+    text_lines = []
+    header = []
+    untimed = False
+
+    def warn_untimed():
+        print(f"Warning: No timestamps found in {name}; indexing it as untimed text.")
+
+    def finish():
+        if current is not None and text_lines:
+            current.text = " ".join(text_lines)
+            return current
+        return None
+
+    for line in lines:
+        line = line.strip()
+        if not line or CUE_ID_LINE.match(line):
+            continue
+        if untimed:
+            yield _untimed(line)
+            continue
+        # Cheap character checks first: most lines are speech and need no regex at all.
+        match = (TIMESTAMP_LINE.match(line) or CUE_LINE.match(line)) if line[0].isdigit() else None
+        speaker = ""
+        if match is None:
+            match = SPEAKER_TIMESTAMP_LINE.match(line) if line[-1].isdigit() and line[0].isupper() else None
+            if match is None:
+                if current is not None:
+                    if not text_lines:
+                        voice = VOICE_TAG.match(line) or SPEAKER_LABEL.match(line)
+                        if voice:
+                            current.speaker = voice.group(1).strip()
+                            line = voice.group(2).strip()
+                    if line:
+                        text_lines.append(line)
+                else:
+                    # Before the first timestamp: a title, unless no timestamp ever comes.
+                    header.append(line)
+                    if len(header) >= UNTIMED_AFTER_LINES:
+                        untimed = True
+                        warn_untimed()
+                        yield from map(_untimed, header)
+                        header = []
+                continue
+            speaker = match.group(1)
+            hours, minutes, seconds = match.group(2, 3, 4)
+        else:
+            hours, minutes, seconds = match.group(1, 2, 3)
+        header = []
+        utterance = finish()
+        if utterance is not None:
+            yield utterance
+        current = Utterance(_seconds(hours, minutes, seconds), speaker, "")
+        if match.re is CUE_LINE:
+            current.end = _seconds(*match.group(4, 5, 6))
+        text_lines = []
+    utterance = finish()
+    if utterance is not None:
+        yield utterance
+    if header:
+        # Ended before reaching UNTIMED_AFTER_LINES without a single timestamp.
+        warn_untimed()
+        yield from map(_untimed, header)
+
+def _render(turns):
+    # Consecutive utterances by one speaker become one paragraph, so the turn structure survives.
+    paragraphs = []
+    for speaker, text in turns:
+        if paragraphs and paragraphs[-1][0] == speaker:
+            paragraphs[-1][1].append(text)
+        else:
+            paragraphs.append((speaker, [text]))
+    return "\n\n".join(f"{speaker}: {' '.join(texts)}" if speaker else " ".join(texts) for speaker, texts in paragraphs)
+
+def segment_transcript(utterances, window_seconds=TRANSCRIPT_WINDOW_SECONDS, pause_seconds=TRANSCRIPT_PAUSE_SECONDS,
+                       max_tokens=CHUNK_TARGET_TOKENS):
+    """
+    Group utterances into TranscriptSegments that each cover one stretch of the recording. A
+    segment closes when it spans window_seconds, when the next utterance would take it over
+    max_tokens, or at a pause of pause_seconds or more. An utterance longer than max_tokens
+    on its own is split with chunk_text into segments sharing its times. Only the open
+    segment is held in memory.
+    """
+    turns, speakers, tokens = [], [], 0
+    start = last = None
+    for utterance in utterances:
+        utterance_tokens = count_tokens(utterance.text)
+        if utterance_tokens > max_tokens:
+            if turns:
+                yield TranscriptSegment(start, utterance.start if utterance.start - last < pause_seconds else last,
+                                        speakers, _render(turns))
+                turns, speakers, tokens = [], [], 0
+            last = utterance.end if utterance.end is not None else utterance.start
+            for piece in chunk_text(utterance.text, max_tokens):
+                yield TranscriptSegment(utterance.start, last, [utterance.speaker] if utterance.speaker else [],
+                                        _render([(utterance.speaker, piece)]))
+            continue
+        if turns and (utterance.start - start >= window_seconds or utterance.start - last >= pause_seconds
+                      or tokens + utterance_tokens > max_tokens):
+            yield TranscriptSegment(start, utterance.start if utterance.start - last < pause_seconds else last,
+                                    speakers, _render(turns))
+            turns, speakers, tokens = [], [], 0
+        if not turns:
+            start = utterance.start
+        turns.append((utterance.speaker, utterance.text))
+        if utterance.speaker and utterance.speaker not in speakers:
+            speakers.append(utterance.speaker)
+        tokens += utterance_tokens
+        last = utterance.end if utterance.end is not None else utterance.start
+    if turns:
+        yield TranscriptSegment(start, last, speakers, _render(turns))
@@ -0,0 +1,92 @@
+import os
+import time
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+from metrics import Counter, Gauge, Histogram
+from admission import ADMISSION_PER_CONVERSATION_QUEUE
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Async job mode: /api/messages acknowledges at once and a worker sends the answer proactively.
+BOT_ASYNC_TURNS = os.environ.get("BOT_ASYNC_TURNS", "false").lower() == "true"
+TURN_JOB_WORKERS = int(os.environ.get("TURN_JOB_WORKERS", "16"))
+TURN_JOB_QUEUE_SIZE = int(os.environ.get("TURN_JOB_QUEUE_SIZE", "128"))
+
+JOB_OUTCOMES = Counter("bot_turn_jobs_total", "Background turn jobs by outcome: queued, rejected, rejected_conversation, succeeded, failed.", ("outcome",))
+JOB_QUEUE_DEPTH = Gauge("bot_turn_job_queue_depth", "Background turn jobs waiting for a worker.")
+JOB_RUNNING = Gauge("bot_turn_jobs_running", "Background turn jobs being worked on.")
+JOB_WAIT = Histogram("bot_turn_job_wait_seconds", "Time a job waited in the queue before a worker picked it up.")
+JOB_LATENCY = Histogram("bot_turn_job_duration_seconds", "Time from acknowledging a turn to finishing its answer.")
+
+class TurnJobQueue:
+    """
+    Bounded queue of turn jobs worked off by a fixed pool of tasks. A job is a coroutine
+    function with no arguments. submit() never waits: it returns False when the queue
+    is full, or when the job's conversation already has per_conversation jobs pending (the
+    same cap admission.py puts on waiting turns), so the webhook can answer with a busy
+    reply instead. The queue is created in start(), on the loop that serves the app.
+    """
+    def __init__(self, workers=TURN_JOB_WORKERS, queue_size=TURN_JOB_QUEUE_SIZE,
+                 per_conversation=ADMISSION_PER_CONVERSATION_QUEUE):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.per_conversation = per_conversation
+        self.queue = None
+        self.running = 0
+        self._by_conversation = {}
+        self._tasks = []
+
+    @property
+    def pending(self):
+        return (self.queue.qsize() if self.queue is not None else 0) + self.running
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job, name="", conversation_id=""):
+        if self._by_conversation.get(conversation_id, 0) >= self.per_conversation:
+            JOB_OUTCOMES.inc(outcome="rejected_conversation")
+            return False
+        try:
+            self.queue.put_nowait((job, name, conversation_id, time.perf_counter()))
+        except asyncio.QueueFull:
+            JOB_OUTCOMES.inc(outcome="rejected")
+            return False
+        self._by_conversation[conversation_id] = self._by_conversation.get(conversation_id, 0) + 1
+        JOB_OUTCOMES.inc(outcome="queued")
+        JOB_QUEUE_DEPTH.set(self.queue.qsize())
+        return True
+
+    async def _worker(self):
+        while True:
+            job, name, conversation_id, queued_at = await self.queue.get()
+            JOB_QUEUE_DEPTH.set(self.queue.qsize())
+            JOB_WAIT.observe(time.perf_counter() - queued_at)
+            self.running += 1
+            JOB_RUNNING.set(self.running)
+            try:
+                await job()
+                JOB_OUTCOMES.inc(outcome="succeeded")
+            except Exception as e:
+                JOB_OUTCOMES.inc(outcome="failed")
+                logger.error(f"Turn job {name} failed: {e}", exc_info=True)
+            finally:
+                self.running -= 1
+                JOB_RUNNING.set(self.running)
+                self._by_conversation[conversation_id] -= 1
+                if not self._by_conversation[conversation_id]:
+                    del self._by_conversation[conversation_id]
+                JOB_LATENCY.observe(time.perf_counter() - queued_at)
+                self.queue.task_done()